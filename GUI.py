@@ -40,7 +40,8 @@ def main():
     load_images()
     clock = pygame.time.Clock()
 
-    ai_white = ChessEngine()
+    # Pondering: our engine keeps searching while Stockfish thinks about its move.
+    ai_white = ChessEngine(ponder=True)
     stockfish_path = "stockfish-windows-x86-64-avx2.exe"
     ai_black = StockfishEngine(path=stockfish_path, parameters={"Skill Level": 5, "Threads": 0, "Minimum Thinking Time": 5})
 
@@ -65,6 +66,8 @@ def main():
 
 
             board.push(move)
+            if board.turn == chess.BLACK:
+                ai_white.ponder(board)
 
             draw_board(screen)
             draw_pieces(board, screen)
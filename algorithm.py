@@ -1,235 +1,395 @@
-import time
 import math
 import random
 import chess
-from pieces import opening_book, transposition_table, material_value
-from evaluation import evaluate_board
-killer_moves = {}
-history_heuristic = {}
-
-
-def order_moves(board, depth, prev_best_move=None):
-    moves = list(board.legal_moves)
-    move_scores = {}
-
-    piece_moved = {}
-
-    for move in moves:
-        score = 0
+from pieces import material_value
+from evaluation import evaluate_position
+from search_board import SearchBoard
+from transposition import TranspositionTable, EXACT, LOWERBOUND, UPPERBOUND
+from time_manager import TimeManager, SearchAborted
+from search_stats import SearchStats
+from search_context import SearchContext, MAX_PLY, move_index
+# Shared by every search in the process (and with the Lazy SMP helpers, see smp.py); the
+# rest of the search state lives in a SearchContext.
+transposition_table = TranspositionTable()
+
+
+# Quiet move ordering bonuses, computed once per node in staged_moves.
+PIECE_ORDER_BONUS = {
+    chess.PAWN: 1500,
+    chess.KNIGHT: 1000,
+    chess.BISHOP: 3500,
+    chess.ROOK: 2500,
+    chess.QUEEN: 3000,
+    chess.KING: 0,
+}
+CENTRAL_PAWN_BONUS = 500
+CENTER_BONUS = 1500
+CHECK_BONUS = 3000
+MINOR_START_BONUS = 3000
+PROMOTION_BONUS = 10000
+DELTA_MARGIN = 200  # quiescence delta pruning safety margin
+
+# Forward pruning in the last three plies, never in check and never with a mate score in
+# the window. Margins are indexed by remaining depth and sized for this evaluation, where a
+# single quiet move often moves the static score by thousands. Only reverse futility is on
+# by default; the others lost too much on `bench.py pruning` for the nodes they saved (see
+# configure_pruning to switch them on).
+PRUNING = {
+    'reverse_futility': True,  # static eval - margin >= beta: fail high without a search
+    'razoring': False,  # static eval + margin <= alpha: drop into quiescence
+    'futility': False,  # static eval + margin <= alpha: skip quiet non-checking moves
+    'late_move_pruning': False,  # skip quiet non-checking moves after the first few
+}
+DEFAULT_PRUNING = dict(PRUNING)
+# How far a search can fall below the static eval of the side to move: about 2% of the
+# bench nodes drop by more than 9700 at depth 1 and 2 and 11500 at depth 3.
+REVERSE_FUTILITY_MARGINS = [0, 9700, 9700, 11500]
+RAZOR_MARGINS = [0, 6000, 8000]
+FUTILITY_MARGINS = [0, 6000, 8000, 8000]
+LATE_MOVE_COUNTS = [0, 20, 30, 40]
+MAX_PRUNING_DEPTH = 3
+MATE_BOUND = 900000  # scores beyond this are mate scores
+
+BB_CENTER_FILES = chess.BB_FILE_C | chess.BB_FILE_D | chess.BB_FILE_E | chess.BB_FILE_F
+BB_CENTER_16 = BB_CENTER_FILES & (chess.BB_RANK_3 | chess.BB_RANK_4 | chess.BB_RANK_5 | chess.BB_RANK_6)
+MINOR_START_SQUARES = {
+    chess.WHITE: chess.BB_B1 | chess.BB_C1 | chess.BB_F1 | chess.BB_G1,
+    chess.BLACK: chess.BB_B8 | chess.BB_C8 | chess.BB_F8 | chess.BB_G8,
+}
+
+
+def check_squares(board, color):
+    # Squares from which each piece type of `color` would give direct check.
+    king = board.king(not color)
+    if king is None:
+        return [0] * 7
+    occupied = board.occupied
+    diagonal = chess.BB_DIAG_ATTACKS[king][chess.BB_DIAG_MASKS[king] & occupied]
+    straight = (chess.BB_RANK_ATTACKS[king][chess.BB_RANK_MASKS[king] & occupied]
+                | chess.BB_FILE_ATTACKS[king][chess.BB_FILE_MASKS[king] & occupied])
+    return [0, chess.BB_PAWN_ATTACKS[not color][king], chess.BB_KNIGHT_ATTACKS[king], diagonal, straight,
+            diagonal | straight, 0]
+
+
+def capture_score(board, move):
+    # MVV-LVA, with promotions ahead of plain captures.
+    victim_type = board.piece_type_at(move.to_square) or chess.PAWN  # empty target: en passant
+    aggressor_type = board.piece_type_at(move.from_square)
+    score = 10 * material_value[victim_type] - material_value[aggressor_type]
+    if move.promotion:
+        score += PROMOTION_BONUS + material_value[move.promotion]
+    return score
+
+
+def is_losing_capture(board, move, checks):
+    # Underpromotions, and captures of a cheaper piece on a defended square that do not check.
+    if move.promotion:
+        return move.promotion != chess.QUEEN
+    aggressor_type = board.piece_type_at(move.from_square)
+    if chess.BB_SQUARES[move.to_square] & checks[aggressor_type]:
+        return False
+    victim_type = board.piece_type_at(move.to_square) or chess.PAWN
+    return material_value[victim_type] < material_value[aggressor_type] \
+        and board.is_attacked_by(not board.turn, move.to_square)
+
+
+def generate_captures(board):
+    # Legal captures, en passant captures and promotions, generated from bitboard masks
+    # instead of filtering the full legal move list.
+    turn = board.turn
+    promotion_from = board.pawns & board.occupied_co[turn] & (chess.BB_RANK_7 if turn == chess.WHITE else chess.BB_RANK_2)
+    captures = list(board.generate_legal_moves(chess.BB_ALL, board.occupied_co[not turn]))
+    captures.extend(board.generate_legal_moves(promotion_from, ~board.occupied))
+    if board.ep_square is not None:
+        captures.extend(board.generate_legal_ep())
+    return captures
+
+
+def generate_quiet_checks(board, checks):
+    # Non-capturing moves that give direct check (discovered checks are not looked for).
+    quiet_checks = []
+    for move in board.generate_legal_moves(chess.BB_ALL, ~board.occupied):
+        if not move.promotion and chess.BB_SQUARES[move.to_square] & checks[board.piece_type_at(move.from_square)]:
+            quiet_checks.append(move)
+    return quiet_checks
+
+
+def staged_moves(context, board, ply, tt_move=None):
+    # Yields legal moves lazily, stage by stage, so a node that cuts off on the hash move
+    # or a good capture never generates or scores the quiet moves:
+    #   hash move, winning/equal captures and queen promotions by MVV-LVA, killers of this
+    #   ply, the countermove, quiet moves by history and static bonuses, losing captures
+    #   and underpromotions.
+    turn = board.turn
+    if tt_move and board.is_legal(tt_move):
+        yield tt_move
+    else:
+        tt_move = None
+
+    # Per-node ordering setup, shared by every move below.
+    checks = check_squares(board, turn)
+    them = board.occupied_co[not turn]
+    ep_square = board.ep_square
+    good_captures = []
+    bad_captures = []
+    for move in generate_captures(board):
+        if move == tt_move:
+            continue
+        if is_losing_capture(board, move, checks):
+            bad_captures.append((capture_score(board, move), move))
+        else:
+            good_captures.append((capture_score(board, move), move))
+
+    good_captures.sort(key=lambda item: item[0], reverse=True)
+    for _, move in good_captures:
+        yield move
+
+    killers = []
+    for killer in context.killers[ply] + [context.countermove(board)]:
+        if killer and killer != tt_move and killer not in killers and not killer.promotion \
+                and not board.is_capture(killer) and board.is_legal(killer):
+            killers.append(killer)
+            yield killer
+
+    history = context.history
+    opening = board.fullmove_number <= 10
+    minor_start = MINOR_START_SQUARES[turn] if opening else 0
+    quiets = []
+    for move in board.generate_legal_moves(chess.BB_ALL, ~them):
         from_square = move.from_square
-        piece = board.piece_at(from_square)
-
-        if prev_best_move and move == prev_best_move:
-            score += 100000
-
-        if board.is_capture(move):
-            victim = board.piece_at(move.to_square)
-            aggressor = board.piece_at(move.from_square)
-            if victim and aggressor:
-                victim_value = material_value.get(victim.piece_type, 0)
-                aggressor_value = material_value.get(aggressor.piece_type, 0)
-                score += 10 * victim_value - aggressor_value + 5000
-
-        if move.promotion:
-            score += 10000
-
-        if board.gives_check(move):
-            score += 3000
-
-        if depth in killer_moves and move in killer_moves[depth]:
-            score += 4500
-
-        history_value = history_heuristic.get((from_square, move.to_square), 0)
-        score += history_value
-
-        if piece:
-            piece_type = piece.piece_type
-            piece_key = (piece_type, from_square)
-
-            if piece_key not in piece_moved:
-                if piece_type == chess.BISHOP:
-                    score += 3500
-                elif piece_type == chess.QUEEN:
-                    score += 3000
-                elif piece_type == chess.ROOK:
-                    score += 2500
-                elif piece_type == chess.PAWN:
-                    file = chess.square_file(from_square)
-                    if 2 <= file <= 5 and board.fullmove_number <= 10:
-                        score += 2000
-                    else:
-                        score += 1500
-                elif piece_type == chess.KNIGHT:
-                    score += 1000
-
-                piece_moved[piece_key] = True
-
-        to_file = chess.square_file(move.to_square)
-        to_rank = chess.square_rank(move.to_square)
-        if 2 <= to_file <= 5 and 2 <= to_rank <= 5:
-            score += 1500
-
-        if board.fullmove_number <= 10:
-            if piece and piece.piece_type in [chess.BISHOP, chess.KNIGHT]:
-                piece_color = piece.color
-                is_starting_position = False
-
-                if piece_color == chess.WHITE:
-                    if piece.piece_type == chess.BISHOP and from_square in [chess.C1, chess.F1]:
-                        is_starting_position = True
-                    elif piece.piece_type == chess.KNIGHT and from_square in [chess.B1, chess.G1]:
-                        is_starting_position = True
-                else:
-                    if piece.piece_type == chess.BISHOP and from_square in [chess.C8, chess.F8]:
-                        is_starting_position = True
-                    elif piece.piece_type == chess.KNIGHT and from_square in [chess.B8, chess.G8]:
-                        is_starting_position = True
-
-                if is_starting_position:
-                    score += 3000
-
-        move_scores[move] = score
-
-    return sorted(moves, key=lambda move: move_scores.get(move, 0), reverse=True)
-
-
-def use_opening_book(board):
-    try:
-        fen = board.fen()
-        fen_parts = fen.split(' ')
-        position_fen = ' '.join(fen_parts[:4])
-
-        for book_fen, move_uci in opening_book.items():
-            book_fen_parts = book_fen.split(' ')
-            book_position_fen = ' '.join(book_fen_parts[:4])
-
-            if book_position_fen == position_fen:
-                try:
-                    book_move = chess.Move.from_uci(move_uci)
-                    if book_move in board.legal_moves:
-                        return book_move
-                except ValueError:
-                    try:
-                        book_move = board.parse_san(move_uci)
-                        if book_move in board.legal_moves:
-                            return book_move
-                    except ValueError:
-                        pass
-    except Exception:
-        pass
-
-    return None
-
-
-def quiescence_search(board, alpha, beta, color, depth=0, max_depth=8):
-    if depth >= max_depth:
-        return color * evaluate_board(board)
-
-    stand_pat = color * evaluate_board(board)
-
-    if stand_pat >= beta:
-        return beta
-    if alpha < stand_pat:
-        alpha = stand_pat
+        piece_type = board.piece_type_at(from_square)
+        if move.promotion or move == tt_move or move in killers \
+                or (piece_type == chess.PAWN and move.to_square == ep_square):
+            continue
+        to_bb = chess.BB_SQUARES[move.to_square]
+        score = history[move_index(move)] + PIECE_ORDER_BONUS[piece_type]
+        if piece_type == chess.PAWN and opening and chess.BB_SQUARES[from_square] & BB_CENTER_FILES:
+            score += CENTRAL_PAWN_BONUS
+        if to_bb & BB_CENTER_16:
+            score += CENTER_BONUS
+        if to_bb & checks[piece_type]:
+            score += CHECK_BONUS
+        if chess.BB_SQUARES[from_square] & minor_start:
+            score += MINOR_START_BONUS
+        quiets.append((score, move))
+
+    quiets.sort(key=lambda item: item[0], reverse=True)
+    for _, move in quiets:
+        yield move
+
+    bad_captures.sort(key=lambda item: item[0], reverse=True)
+    for _, move in bad_captures:
+        yield move
+
+
+def quiescence_search(context, board, alpha, beta, color, depth=0, max_depth=8):
+    # Captures and promotions only, plus quiet checks at the first qply. Captures that
+    # cannot lift the stand-pat score to alpha even with a margin are skipped (delta
+    # pruning). In check every evasion is searched instead and there is no stand pat.
+    # Results are stored in the transposition table at depth 0, and entries of any depth
+    # can cut off here.
+    context.time_manager.check()
+    search_stats = context.stats
+    search_stats.qnodes += 1
+    if board.is_insufficient_material():
+        return 0
 
+    key = board.zobrist_key
+    tt_move = None
+    entry = transposition_table.probe(key)
+    search_stats.tt_probes += 1
+    if entry:
+        search_stats.tt_hits += 1
+        stored_score, _, stored_flag, tt_move = entry
+        if stored_flag == EXACT or (stored_flag == LOWERBOUND and stored_score >= beta) \
+                or (stored_flag == UPPERBOUND and stored_score <= alpha):
+            search_stats.tt_cutoffs += 1
+            return stored_score
+    # Never let a quiescence result overwrite an entry from the main search.
+    replace = entry is None or entry[1] == 0
+
+    # Mate and stalemate come from the move generation: in check, or with only king and
+    # pawns left, all legal moves are generated once and the moves searched come from them.
+    turn = board.turn
+    in_check = board.is_check()
+    legal_moves = None
+    if in_check or not board.occupied_co[turn] & ~(board.pawns | board.kings):
+        legal_moves = list(board.generate_legal_moves())
+        if not legal_moves:
+            return -999999 if in_check else 0
+
+    alpha_orig = alpha
+    if in_check and depth < max_depth:
+        stand_pat = None
+        moves = sorted((move for move in legal_moves if move.promotion or board.is_capture(move)),
+                       key=lambda move: capture_score(board, move), reverse=True)
+        moves.extend(move for move in legal_moves if not move.promotion and not board.is_capture(move))
+    else:
+        # A side with pieces besides king and pawns can still be stalemated (pinned or
+        # blocked pieces): without a capture or promotion, make sure some move exists before
+        # trusting the stand pat. The generator stops at the first legal move.
+        if legal_moves is None:
+            moves = generate_captures(board)
+            if not moves and next(board.generate_legal_moves(), None) is None:
+                return 0
+        else:
+            moves = [move for move in legal_moves if move.promotion or board.is_capture(move)]
 
-    moves = [move for move in board.legal_moves if board.is_capture(move) or move.promotion or board.gives_check(move)]
+        # Lazy evaluation against the window, from white's point of view.
+        if color == 1:
+            stand_pat = evaluate_position(board, alpha, beta, search_stats)
+        else:
+            stand_pat = -evaluate_position(board, -beta, -alpha, search_stats)
+        if depth >= max_depth:
+            return stand_pat
 
-    moves.sort(key=lambda move: score_capture(board, move), reverse=True)
+        if stand_pat >= beta:
+            return beta
+        if alpha < stand_pat:
+            alpha = stand_pat
+
+        moves.sort(key=lambda move: capture_score(board, move), reverse=True)
+        if depth == 0:
+            checks = check_squares(board, turn)
+            if legal_moves is None:
+                moves.extend(generate_quiet_checks(board, checks))
+            else:
+                moves.extend(move for move in legal_moves if not move.promotion and not board.is_capture(move)
+                             and chess.BB_SQUARES[move.to_square] & checks[board.piece_type_at(move.from_square)])
+    if tt_move in moves:
+        moves.remove(tt_move)
+        moves.insert(0, tt_move)
 
+    best_move = None
     for move in moves:
+        if stand_pat is not None and not move.promotion:
+            victim_type = board.piece_type_at(move.to_square)
+            if victim_type is None and board.is_en_passant(move):
+                victim_type = chess.PAWN
+            if victim_type and stand_pat + material_value[victim_type] + DELTA_MARGIN < alpha:
+                continue
+
         board.push(move)
-        score = -quiescence_search(board, -beta, -alpha, -color, depth + 1, max_depth)
+        score = -quiescence_search(context, board, -beta, -alpha, -color, depth + 1, max_depth)
         board.pop()
 
         if score >= beta:
+            if replace:
+                transposition_table.store(key, beta, 0, LOWERBOUND, move)
             return beta
         if score > alpha:
             alpha = score
+            best_move = move
 
+    if replace:
+        transposition_table.store(key, alpha, 0, EXACT if alpha > alpha_orig else UPPERBOUND, best_move)
     return alpha
 
 
-def score_capture(board, move):
-    if not board.is_capture(move):
-        return 0
-
-    victim = board.piece_at(move.to_square)
-    aggressor = board.piece_at(move.from_square)
-
-    if not victim or not aggressor:
-        return 0
-
-    victim_value = material_value.get(victim.piece_type, 0)
-    aggressor_value = material_value.get(aggressor.piece_type, 0)
-
-    return victim_value - (aggressor_value / 10)
-
-
-def negamax_with_quiescence(board, depth, alpha, beta, color):
-    if board.is_repetition(2):
+def negamax_with_quiescence(context, board, depth, alpha, beta, color, ply=1):
+    # Principal variation search: the first move gets the full window, later moves a null
+    # window scout that is only re-searched with the full window if it fails high inside it.
+    # pv_table[ply] holds the principal variation from this node (triangular PV table).
+    pv_table = context.pv_table
+    pv_table[ply] = []
+    context.time_manager.check()
+    search_stats = context.stats
+    search_stats.nodes += 1
+    if board.is_draw_by_rule():
         return 0
 
-    if depth == 0 or board.is_game_over():
-        return quiescence_search(board, alpha, beta, color)
+    if depth == 0 or ply >= MAX_PLY:
+        return quiescence_search(context, board, alpha, beta, color)
 
-    key = board.fen()
+    key = board.zobrist_key
+    alpha_orig = alpha
+    prev_best_move = None
 
     # Transposition table lookup
-    if key in transposition_table:
-        stored_score, stored_depth, stored_flag, prev_move = transposition_table[key]
+    entry = transposition_table.probe(key)
+    search_stats.tt_probes += 1
+    if entry:
+        search_stats.tt_hits += 1
+        stored_score, stored_depth, stored_flag, prev_best_move = entry
         if stored_depth >= depth:
-            if stored_flag == 'EXACT':
+            if stored_flag == EXACT:
+                search_stats.tt_cutoffs += 1
                 return stored_score
-            elif stored_flag == 'LOWERBOUND' and stored_score > alpha:
+            elif stored_flag == LOWERBOUND and stored_score > alpha:
                 alpha = max(alpha, stored_score)
-            elif stored_flag == 'UPPERBOUND' and stored_score < beta:
+            elif stored_flag == UPPERBOUND and stored_score < beta:
                 beta = min(beta, stored_score)
             if alpha >= beta:
+                search_stats.tt_cutoffs += 1
                 return stored_score
 
-    if board.is_check():
+    in_check = board.is_check()
+    if in_check:
         depth += 1
 
-    if depth >= 3 and not board.is_check() and has_non_pawn_material(board, board.turn):
+    # Forward pruning near the leaves, from the static evaluation of this node. Reverse
+    # futility and razoring only at null window nodes, where the exact score is not needed;
+    # the evaluation is only paid for when a technique that applies here will read it.
+    prunable = depth <= MAX_PRUNING_DEPTH and not in_check and -MATE_BOUND < alpha and beta < MATE_BOUND
+    null_window = beta - alpha == 1
+    static_eval = None
+    if prunable and (PRUNING['futility'] or null_window and (PRUNING['reverse_futility'] or PRUNING['razoring'])):
+        static_eval = color * evaluate_position(board)
+        if null_window:
+            if PRUNING['reverse_futility'] and static_eval - REVERSE_FUTILITY_MARGINS[depth] >= beta:
+                search_stats.reverse_futility_cutoffs += 1
+                return beta
+            if PRUNING['razoring'] and depth < len(RAZOR_MARGINS) and static_eval + RAZOR_MARGINS[depth] <= alpha:
+                score = quiescence_search(context, board, alpha, beta, color)
+                if score <= alpha:
+                    search_stats.razor_cutoffs += 1
+                    return score
+
+    if depth >= 3 and not in_check and has_non_pawn_material(board, board.turn):
         R = 2 if depth >= 4 else 1
 
         board.push(chess.Move.null())
-        null_move_score = -negamax_with_quiescence(board, depth - 1 - R, -beta, -beta + 1, -color)
+        null_move_score = -negamax_with_quiescence(context, board, depth - 1 - R, -beta, -beta + 1, -color, ply + 1)
         board.pop()
 
         if null_move_score >= beta:
+            search_stats.null_move_cutoffs += 1
             return beta
 
-    prev_best_move = None
-    if key in transposition_table:
-        stored_score, stored_depth, stored_flag, prev_move = transposition_table.get(key, (None, None, None, None))
-        prev_best_move = prev_move
-
-    moves = order_moves(board, depth, prev_best_move)
     best_score = -float('inf')
     best_move = None
     moves_searched = 0
+    futile = static_eval is not None and PRUNING['futility'] and static_eval + FUTILITY_MARGINS[depth] <= alpha
+    late_move_count = LATE_MOVE_COUNTS[depth] if prunable and PRUNING['late_move_pruning'] else None
 
-    if depth <= 6 and board.fullmove_number <= 10:
-        book_move = use_opening_book(board)
-        if book_move and book_move in moves:
-            moves.remove(book_move)
-            moves.insert(0, book_move)
-
-    for move in moves:
+    for move in staged_moves(context, board, ply, prev_best_move):
         moves_searched += 1
+        quiet = not board.is_capture(move) and not move.promotion
         board.push(move)
 
-        if moves_searched > 1 and depth >= 3 and not board.is_check() and not board.is_capture(
-                move) and not move.promotion:
-            reduction = 1 if moves_searched > 4 else 0
-            score = -negamax_with_quiescence(board, depth - 1 - reduction, -beta, -alpha, -color)
+        if moves_searched > 1 and quiet and (futile or late_move_count and moves_searched > late_move_count) \
+                and not board.is_check():
+            board.pop()
+            if futile:
+                # The skipped move is assumed to score no more than the futility bound.
+                search_stats.futility_prunes += 1
+                best_score = max(best_score, static_eval + FUTILITY_MARGINS[depth])
+            else:
+                search_stats.late_move_prunes += 1
+            continue
 
-            if score > alpha:
-                score = -negamax_with_quiescence(board, depth - 1, -beta, -alpha, -color)
+        if moves_searched == 1:
+            score = -negamax_with_quiescence(context, board, depth - 1, -beta, -alpha, -color, ply + 1)
         else:
-            score = -negamax_with_quiescence(board, depth - 1, -beta, -alpha, -color)
+            # Late move reductions for quiet moves that do not give check.
+            reduction = 1 if moves_searched > 4 and depth >= 3 and quiet and not board.is_check() else 0
+            score = -negamax_with_quiescence(context, board, depth - 1 - reduction, -alpha - 1, -alpha, -color, ply + 1)
+            if score > alpha and reduction:
+                search_stats.lmr_researches += 1
+                score = -negamax_with_quiescence(context, board, depth - 1, -alpha - 1, -alpha, -color, ply + 1)
+            if alpha < score < beta:
+                search_stats.pvs_researches += 1
+                score = -negamax_with_quiescence(context, board, depth - 1, -beta, -alpha, -color, ply + 1)
 
         board.pop()
 
@@ -237,50 +397,82 @@ def negamax_with_quiescence(board, depth, alpha, beta, color):
             best_score = score
             best_move = move
 
-        alpha = max(alpha, score)
+        if score > alpha:
+            alpha = score
+            pv_table[ply] = [move] + pv_table[ply + 1]
         if alpha >= beta:
-            if not board.is_capture(move) and not move.promotion:
-                killer_moves.setdefault(depth, []).append(move)
-                history_key = (move.from_square, move.to_square)
-                history_heuristic[history_key] = history_heuristic.get(history_key, 0) + depth * depth
+            search_stats.fail_highs += 1
+            if moves_searched == 1:
+                search_stats.first_move_fail_highs += 1
+            if quiet:
+                context.update_quiet(board, move, depth, ply)
 
-            transposition_table[key] = (beta, depth, 'LOWERBOUND', move)
+            transposition_table.store(key, beta, depth, LOWERBOUND, move)
             return beta
 
-    flag = 'EXACT'
-    if best_score <= alpha:
-        flag = 'UPPERBOUND'
+    if not moves_searched:
+        # No legal moves: checkmate or stalemate.
+        best_score = -999999 if in_check else 0
+        transposition_table.store(key, best_score, depth, EXACT, None)
+        return best_score
+
+    flag = EXACT
+    if best_score <= alpha_orig:
+        flag = UPPERBOUND
     elif best_score >= beta:
-        flag = 'LOWERBOUND'
+        flag = LOWERBOUND
 
-    transposition_table[key] = (best_score, depth, flag, best_move if best_move else None)
+    transposition_table.store(key, best_score, depth, flag, best_move)
     return best_score
 
 
+def configure_pruning(enabled=(), disabled=()):
+    # Switches the PRUNING techniques named in `enabled` on and those in `disabled` off;
+    # the rest go back to their defaults.
+    for name in list(enabled) + list(disabled):
+        if name not in PRUNING:
+            raise ValueError(f"unknown pruning technique: {name}")
+    PRUNING.update(DEFAULT_PRUNING)
+    for name in enabled:
+        PRUNING[name] = True
+    for name in disabled:
+        PRUNING[name] = False
+
+
 def has_non_pawn_material(board, color):
     for piece_type in [chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN]:
         if any(board.pieces(piece_type, color)):
             return True
     return False
 
-import multiprocessing
-
-def evaluate_move(move, board_fen, depth, alpha, beta):
-    board = chess.Board(board_fen)
-    board.push(move)
-    score = -negamax_with_quiescence(board, depth, -beta, -alpha, -1)
-    return move, score
-
-def iterative_deepening(board, max_depth=10, time_limit=5.0):
-    start_time = time.time()
+def iterative_deepening(board, max_depth=10, time_limit=5.0, helper_id=0, stop_flag=None, limits=None,
+                        stats=None, on_iteration=None, context=None):
+    # helper_id > 0 marks a Lazy SMP helper (see smp.py): helpers share the transposition
+    # table with the main search, so only the main search ages it, and odd helpers start one
+    # ply deeper so the workers do not all walk the same iterations in lockstep.
+    # limits is a TimeManager built from the game clock; without one, time_limit seconds are used.
+    # stats (a SearchStats) is filled in during the search; on_iteration(stats) is called
+    # after every completed iteration.
+    # context (a SearchContext) carries move ordering over from the previous search of the
+    # same game; without one the search starts from empty tables.
+    time_manager = limits or TimeManager(time_limit=time_limit, stop_flag=stop_flag)
+    search_stats = stats or SearchStats()
+    search_stats.start()
+    context = context or SearchContext()
+    context.new_search(time_manager, search_stats)
+    pv_table = context.pv_table
+    root = board
+    board = SearchBoard.from_board(root)
+    color = 1 if board.turn == chess.WHITE else -1
+    if helper_id == 0:
+        transposition_table.new_search()
     best_move = None
     prev_best_move = None
     prev_score = 0
-    killer_moves.clear()
-    history_heuristic.clear()
 
-    for current_depth in range(1, max_depth + 1):
-        if time.time() - start_time > time_limit * 0.9:
+    start_depth = 1 + helper_id % 2
+    for current_depth in range(min(start_depth, max_depth), max_depth + 1):
+        if time_manager.soft_expired():
             break
 
         aspiration_window = 50
@@ -288,50 +480,66 @@ def iterative_deepening(board, max_depth=10, time_limit=5.0):
         beta = prev_score + aspiration_window
         best_score = -float('inf')
         best_move_at_depth = None
-
-        while True:
-            moves = order_moves(board, current_depth, prev_best_move)
-            current_best_score = -float('inf')
-            current_best_move = None
-            search_timed_out = False
-            for move in moves:
-                board.push(move)
-                score = -negamax_with_quiescence(board, current_depth - 1, -beta, -alpha, -1)
-                board.pop()
-
-                if time.time() - start_time > time_limit:
-                    search_timed_out = True
-                    break
-
-                if score > current_best_score:
-                    current_best_score = score
-                    current_best_move = move
-
-                if current_best_score > alpha:
-                    alpha = current_best_score
-
-                if alpha >= beta:
+        current_best_move = None
+
+        try:
+            while True:
+                window_alpha = alpha
+                pv_table[0] = []
+                current_best_score = -float('inf')
+                current_best_move = None
+                moves_searched = 0
+                for move in staged_moves(context, board, 0, prev_best_move):
+                    moves_searched += 1
+                    board.push(move)
+                    if moves_searched == 1:
+                        score = -negamax_with_quiescence(context, board, current_depth - 1, -beta, -alpha, -color)
+                    else:
+                        score = -negamax_with_quiescence(context, board, current_depth - 1, -alpha - 1, -alpha, -color)
+                        if alpha < score < beta:
+                            search_stats.pvs_researches += 1
+                            score = -negamax_with_quiescence(context, board, current_depth - 1, -beta, -alpha, -color)
+                    board.pop()
+
+                    if score > current_best_score:
+                        current_best_score = score
+                        current_best_move = move
+
+                    if current_best_score > alpha:
+                        alpha = current_best_score
+                        pv_table[0] = [move] + pv_table[1]
+
+                    if alpha >= beta:
+                        break
+
+                # Outside the aspiration window the score is only a bound: open that side of
+                # the window and search again.
+                fail_low = current_best_score <= window_alpha and window_alpha > -999999
+                fail_high = current_best_score >= beta and beta < 999999
+                if current_best_move is not None and (fail_low or fail_high):
+                    search_stats.aspiration_researches += 1
+                    if fail_low:
+                        alpha = -999999
+                    else:
+                        alpha, beta = window_alpha, 999999
+                else:
+                    best_score = current_best_score
+                    best_move_at_depth = current_best_move
+                    prev_score = best_score
                     break
-
-            if search_timed_out:
-                break
-            if current_best_move is not None and (current_best_score > beta or current_best_score < alpha):
-                aspiration_window += 50
-                alpha = prev_score - aspiration_window
-                beta = prev_score + aspiration_window
-                alpha = max(alpha, -999999)
-                beta = min(beta, 999999)
-            else:
-                best_score = current_best_score
-                best_move_at_depth = current_best_move
-                prev_score = best_score
-                break
-
-        if search_timed_out and best_move is not None:
+        except SearchAborted:
+            # The board is left mid-line; keep the move from the last completed iteration.
+            if best_move is None:
+                best_move = current_best_move or next(iter(root.legal_moves), None)
             break
 
         if best_move_at_depth:
-        #     print(f"Best move at depth {current_depth}: {best_move_at_depth}")
             best_move = best_move_at_depth
+            prev_best_move = best_move
+            pv = pv_table[0] if pv_table[0] and pv_table[0][0] == best_move else [best_move]
+            search_stats.end_iteration(current_depth, best_score, best_move, pv)
+            if on_iteration:
+                on_iteration(search_stats)
 
+    search_stats.update()
     return best_move
\ No newline at end of file
@@ -0,0 +1,135 @@
+import chess
+
+
+def piece_attacks(piece_type, color, square, occupied):
+    # Same squares as board.attacks(square), without looking the piece up on the board.
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[color][square]
+    if piece_type == chess.KNIGHT:
+        return chess.BB_KNIGHT_ATTACKS[square]
+    if piece_type == chess.KING:
+        return chess.BB_KING_ATTACKS[square]
+    attacks = 0
+    if piece_type != chess.ROOK:
+        attacks = chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    if piece_type != chess.BISHOP:
+        attacks |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+                    | chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+    return attacks
+
+
+def slider_blockers(board, king, color):
+    # Pieces standing alone between `king` and a slider of `color`, mapped to the ray they
+    # block: an own piece there is pinned to that ray, an enemy piece leaving it gives a
+    # discovered check.
+    rooks_and_queens = (board.rooks | board.queens) & board.occupied_co[color]
+    bishops_and_queens = (board.bishops | board.queens) & board.occupied_co[color]
+    snipers = ((chess.BB_RANK_ATTACKS[king][0] | chess.BB_FILE_ATTACKS[king][0]) & rooks_and_queens
+               | chess.BB_DIAG_ATTACKS[king][0] & bishops_and_queens)
+    blockers = {}
+    for sniper in chess.scan_reversed(snipers):
+        between = chess.between(king, sniper) & board.occupied
+        if between and not between & (between - 1):
+            blockers[chess.lsb(between)] = chess.ray(king, sniper)
+    return blockers
+
+
+class AttackMap:
+    # Attack information for one position, built once per evaluate_board call and read by
+    # every term that needs it instead of each term calling is_attacked_by/attacks itself.
+    # pieces[color] lists (piece_type, square, attacks) for every piece of that color;
+    # attacked[color] is the union of those attacks and pawn_attacks[color] the pawn part.
+    def __init__(self, board):
+        self.board = board
+        occupied = board.occupied
+        self.pieces = [[], []]
+        self.attacked = [0, 0]
+        self.pawn_attacks = [0, 0]
+        for color in chess.COLORS:
+            pieces = self.pieces[color]
+            attacked = 0
+            for piece_type in chess.PIECE_TYPES:
+                for square in chess.scan_reversed(board.pieces_mask(piece_type, color)):
+                    attacks = piece_attacks(piece_type, color, square, occupied)
+                    pieces.append((piece_type, square, attacks))
+                    attacked |= attacks
+                if piece_type == chess.PAWN:
+                    self.pawn_attacks[color] = attacked
+            self.attacked[color] = attacked
+        self._moves = None
+
+    def moves(self):
+        # Moves of the side to move for the tactical terms, generated once and shared:
+        # (piece_type, from_square, to_square, promotion, victim_type, gives_check, attacks),
+        # where attacks are the squares the piece attacks from to_square after the move.
+        # Pinned pieces stay on their pin ray and, in check, only evasions are generated.
+        # Castling and en passant are left out.
+        if self._moves is None:
+            self._moves = self._generate_moves()
+        return self._moves
+
+    def _generate_moves(self):
+        board = self.board
+        us = board.turn
+        them = not us
+        own = board.occupied_co[us]
+        enemy = board.occupied_co[them]
+        occupied = board.occupied
+        king = board.king(us)
+        enemy_king = board.king(them)
+
+        evasions = chess.BB_ALL
+        pins = {}
+        if king is not None:
+            checkers = board.attackers_mask(them, king)
+            if checkers:
+                evasions = 0 if checkers & (checkers - 1) else chess.between(king, chess.lsb(checkers)) | checkers
+            pins = slider_blockers(board, king, them)
+        discovered = {}
+        king_mask = 0
+        if enemy_king is not None:
+            discovered = slider_blockers(board, enemy_king, us)
+            king_mask = chess.BB_SQUARES[enemy_king]
+
+        back_rank = chess.BB_RANK_8 if us == chess.WHITE else chess.BB_RANK_1
+        moves = []
+        for piece_type, square, attacks in self.pieces[us]:
+            if piece_type == chess.KING:
+                # Each square is checked without the king on the board, so the king cannot
+                # step back along the ray of a slider giving check.
+                without_king = occupied & ~chess.BB_SQUARES[square]
+                targets = 0
+                for to in chess.scan_reversed(attacks & ~own):
+                    if not board.attackers_mask(them, to, without_king):
+                        targets |= chess.BB_SQUARES[to]
+            else:
+                if piece_type == chess.PAWN:
+                    targets = attacks & enemy
+                    push = square + 8 if us == chess.WHITE else square - 8
+                    if not occupied & chess.BB_SQUARES[push]:
+                        targets |= chess.BB_SQUARES[push]
+                        double = push + (push - square)
+                        if chess.square_rank(square) == (1 if us == chess.WHITE else 6) \
+                                and not occupied & chess.BB_SQUARES[double]:
+                            targets |= chess.BB_SQUARES[double]
+                else:
+                    targets = attacks & ~own
+                targets &= evasions
+                if square in pins and own & chess.BB_SQUARES[square]:
+                    targets &= pins[square]
+
+            vacated = occupied & ~chess.BB_SQUARES[square]
+            discovers = square in discovered and own & chess.BB_SQUARES[square]
+            for to in chess.scan_reversed(targets):
+                to_mask = chess.BB_SQUARES[to]
+                victim_type = board.piece_type_at(to)
+                discovered_check = discovers and not to_mask & discovered[square]
+                if piece_type == chess.PAWN and to_mask & back_rank:
+                    promotions = (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)
+                else:
+                    promotions = (None,)
+                for promotion in promotions:
+                    new_attacks = piece_attacks(promotion or piece_type, us, to, vacated | to_mask)
+                    gives_check = bool(new_attacks & king_mask) or bool(discovered_check)
+                    moves.append((piece_type, square, to, promotion, victim_type, gives_check, new_attacks))
+        return moves
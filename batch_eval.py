@@ -0,0 +1,96 @@
+import chess
+import numpy as np
+
+from search_board import MATERIAL_SCORES, KING_ENDGAME_SCORES, PHASE_UNITS, FULL_PHASE_UNITS
+from evaluation import PASSED_SPANS, PHASE_SCALE, TERM_WEIGHTS
+
+# Vectorized version of the board-only part of evaluate_board: material with piece-square
+# values, the king's endgame square value, game phase and pawn structure. The attack based
+# terms (mobility, king safety, tactics, ...) are not covered, and neither are checkmate and
+# stalemate. Features match evaluate_material, evaluate_game_phase and evaluate_pawn_structure
+# within TOLERANCE; the difference is only the order of floating point additions.
+# evaluate_batch rounds its score like evaluate_tapered and matches it exactly.
+TOLERANCE = 1e-6
+
+# Plane order: white pawn ... white king, black pawn ... black king.
+PLANES = [(color, piece_type) for color in (chess.WHITE, chess.BLACK) for piece_type in chess.PIECE_TYPES]
+WHITE_PAWNS = 0
+BLACK_PAWNS = 6
+
+MATERIAL_WEIGHTS = np.array([MATERIAL_SCORES[color][piece_type] for color, piece_type in PLANES],
+                            dtype=np.float64).reshape(-1)
+KING_ENDGAME_WEIGHTS = np.array([KING_ENDGAME_SCORES[color] if piece_type == chess.KING else [0] * 64
+                                 for color, piece_type in PLANES], dtype=np.float64).reshape(-1)
+PHASE_WEIGHTS = np.array([PHASE_UNITS[piece_type] for _, piece_type in PLANES], dtype=np.int64)
+
+# SPANS[color][blocker, pawn] is 1 when an enemy pawn on `blocker` stops `pawn` from being passed.
+SPANS = [np.array([[(PASSED_SPANS[color][pawn] >> blocker) & 1 for pawn in chess.SQUARES] for blocker in chess.SQUARES],
+                  dtype=np.int32) for color in (chess.BLACK, chess.WHITE)]
+PASSED_BONUS = np.array([50 + chess.square_rank(square) * 10 for square in chess.SQUARES], dtype=np.float64)
+
+
+
+def _board_masks(board):
+    white = board.occupied_co[chess.WHITE]
+    black = board.occupied_co[chess.BLACK]
+    pieces = (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings)
+    return [mask & white for mask in pieces] + [mask & black for mask in pieces]
+
+
+def encode_boards(boards):
+    # (N, 12, 64) uint8 occupancy planes.
+    masks = np.array([_board_masks(board) for board in boards], dtype='<u8').reshape(len(boards), len(PLANES))
+    return np.unpackbits(masks.view(np.uint8).reshape(len(boards), len(PLANES), 8), axis=2, bitorder='little')
+
+
+def evaluate_phase(planes):
+    # Same integer steps as game_phase, scaled to 0..1.
+    units = planes.sum(axis=2, dtype=np.int64) @ PHASE_WEIGHTS
+    return np.minimum(units, FULL_PHASE_UNITS) * PHASE_SCALE // FULL_PHASE_UNITS / PHASE_SCALE
+
+
+def evaluate_pawn_planes(planes):
+    # Doubled/isolated penalties and the passed pawn rank bonus, both from white's point of
+    # view, as cached by probe_pawn_entry.
+    structure = np.zeros(len(planes))
+    passed_base = np.zeros(len(planes))
+    for color, own, enemy in ((chess.WHITE, WHITE_PAWNS, BLACK_PAWNS), (chess.BLACK, BLACK_PAWNS, WHITE_PAWNS)):
+        pawns = planes[:, own].astype(np.int32)
+        counts = pawns.reshape(-1, 8, 8).sum(axis=1)  # pawns per file
+        neighbours = np.zeros_like(counts)
+        neighbours[:, 1:] += counts[:, :-1]
+        neighbours[:, :-1] += counts[:, 1:]
+        penalty = 30 * (counts > 1).sum(axis=1) + 25 * (counts * (neighbours == 0)).sum(axis=1)
+
+        blocked = planes[:, enemy].astype(np.int32) @ SPANS[color]
+        bonus = (pawns * (blocked == 0)) @ PASSED_BONUS
+        structure += -penalty if color == chess.WHITE else penalty
+        passed_base += bonus if color == chess.WHITE else -bonus
+    return structure, passed_base
+
+
+def evaluate_features(planes):
+    flat = planes.reshape(len(planes), len(PLANES) * 64).astype(np.float64)  # explicit width: N may be 0
+    phase = evaluate_phase(planes)
+    material = flat @ MATERIAL_WEIGHTS
+    king_endgame = flat @ KING_ENDGAME_WEIGHTS
+    structure, passed_base = evaluate_pawn_planes(planes)
+    return {
+        'phase': phase,
+        'material': material + king_endgame * (1 - phase),
+        'pawn_structure': structure + passed_base * phase,
+        # Midgame and endgame ends of the taper, in hundredths as in evaluate_tapered.
+        'mg': 100 * material + (structure + passed_base) * TERM_WEIGHTS['evaluate_pawn_structure'][0],
+        'eg': 100 * (material + king_endgame) + structure * TERM_WEIGHTS['evaluate_pawn_structure'][1],
+    }
+
+
+def evaluate_batch(boards):
+    # Material plus pawn structure from white's point of view: the score evaluate_tapered
+    # gives with every other term disabled, rounded down the same way so the two match
+    # exactly. One int64 score per board.
+    features = evaluate_features(encode_boards(boards))
+    phase = np.rint(features['phase'] * PHASE_SCALE).astype(np.int64)
+    mg = np.rint(features['mg']).astype(np.int64)
+    eg = np.rint(features['eg']).astype(np.int64)
+    return (mg * phase + eg * (PHASE_SCALE - phase)) // (100 * PHASE_SCALE)
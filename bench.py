@@ -0,0 +1,285 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import chess
+
+import algorithm
+import evaluation
+from search_board import SearchBoard
+from search_stats import SearchStats
+
+# Fixed position set: openings, middlegames with tactics, endgames and a few terminal
+# positions, with both sides to move. Do not edit casually: the total node count over
+# these positions is the determinism signature compared between commits.
+BENCH_POSITIONS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",
+    "rnbqkb1r/pp2pppp/3p1n2/8/3NP3/2N5/PPP2PPP/R1BQKB1R b KQkq - 2 5",
+    "rnbqkb1r/ppp2ppp/4pn2/3p4/2PP4/2N5/PP2PPPP/R1BQKBNR w KQkq - 2 4",
+    "rnbq1rk1/ppp1ppbp/3p1np1/8/2PPP3/2N2N2/PP3PPP/R1BQKB1R w KQ - 1 6",
+    "rnbqkbnr/ppp2ppp/4p3/3p4/3PP3/8/PPP2PPP/RNBQKBNR w KQkq - 0 3",
+    "rnbqkbnr/pp2pppp/2p5/3p4/3PP3/8/PPP2PPP/RNBQKBNR w KQkq - 0 3",
+    "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10",
+    "r1bq1rk1/ppp2ppp/2np1n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQ1RK1 w - - 0 7",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 10",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 11",
+    "4rrk1/pp1n3p/3q2pQ/2p1pb2/2PP4/2P3N1/P2B2PP/4RRK1 b - - 7 19",
+    "rq3rk1/ppp2ppp/1bnpb3/3N2B1/3NP3/7P/PPPQ1PP1/2KR3R w - - 7 14",
+    "r1bq1r1k/1pp1n1pp/1p1p4/4p2Q/4Pp2/1BNP4/PPP2PPP/3R1RK1 w - - 2 14",
+    "r3r1k1/2p2ppp/p1p1bn2/8/1q2P3/2NPQN2/PPP3PP/R4RK1 b - - 2 15",
+    "r1bbk1nr/pp3p1p/2n5/1N4p1/2Np1B2/8/PPP2PPP/2KR1B1R w kq - 0 13",
+    "r1bq1rk1/ppp1nppp/4n3/3p3Q/3P4/1BP1B3/PP1N2PP/R4RK1 w - - 1 16",
+    "4r1k1/r1q2ppp/ppp2n2/4P3/5Rb1/1N1BQ3/PPP3PP/R5K1 w - - 1 17",
+    "2rqkb1r/ppp2p2/2npb1p1/1N1Nn2p/2P1PP2/8/PP2B1PP/R1BQK2R b KQ - 0 11",
+    "r1bq1r1k/b1p1npp1/p2p3p/1p6/3PP3/1B2NN2/PP3PPP/R2Q1RK1 w - - 1 16",
+    "3r1rk1/p5pp/bpp1pp2/8/q1PP1P2/b3P3/P2NQRPP/1R2B1K1 b - - 6 22",
+    "r1q2rk1/2p1bppp/2Pp4/p6b/Q1PNp3/4B3/PP1R1PPP/2K4R w - - 2 18",
+    "4k2r/1pb2ppp/1p2p3/1R1p4/3P4/2r1PN2/P4PPP/1R4K1 b - - 3 22",
+    "3q2k1/pb3p1p/4pbp1/2r5/PpN2N2/1P2P2P/5PP1/Q2R2K1 b - - 4 26",
+    "6k1/6p1/6Pp/ppp5/3pn2P/1P3K2/1PP2P2/8 b - - 3 54",
+    "3b4/5kp1/1p1p1p1p/pP1PpP1P/P1P1P3/3KN3/8/8 w - - 0 1",
+    "2K5/p7/7P/5pR1/8/5k2/r7/8 w - - 0 1",
+    "8/6pk/1p6/8/PP3p1p/5P2/4KP1q/3Q4 w - - 0 1",
+    "7k/3p2pp/4q3/8/4Q3/5Kp1/P6b/8 w - - 0 1",
+    "8/2p5/8/2kPKp1p/2p4P/2P5/3P4/8 w - - 0 1",
+    "8/1p3pp1/7p/5P1P/2k3P1/8/2K2P2/8 w - - 0 1",
+    "8/pp2r1k1/2p1p3/3pP2p/1P1P1P1P/P5KR/8/8 w - - 0 1",
+    "8/3p4/p1bk3p/Pp6/1Kp1PpPp/2P2P1P/2P5/5B2 b - - 0 1",
+    "5k2/7R/4P2p/5K2/p1r2P1p/8/8/8 b - - 0 1",
+    "6k1/6p1/P6p/r1N5/5p2/7P/1b3PP1/4R1K1 w - - 0 1",
+    "1r3k2/4q3/2Pp3b/3Bp3/2Q2p2/1p1P2P1/1P2KP2/3N4 w - - 0 1",
+    "6k1/4pp1p/3p2p1/P1pPb3/R7/1r2P1PP/3B1P2/6K1 w - - 0 1",
+    "8/3p3B/5p2/5P2/p7/PP5b/k7/6K1 w - - 0 1",
+    "5rk1/q6p/2p3bR/1pPp1rP1/1P1Pp3/P3B1Q1/1K3P2/R7 w - - 93 90",
+    "4rrk1/1p1nq3/p7/2p1P1pp/3P2bp/3Q1Bn1/PPPB4/1K2R1NR w - - 40 21",
+    "r3k2r/3nnpbp/q2pp1p1/p7/Pp1PPPP1/4BNN1/1P5P/R2Q1RK1 w kq - 0 16",
+    "3Qb1k1/1r2ppb1/pN1n2q1/Pp1Pp1Pr/4P2p/4BP2/4B1R1/1R5K b - - 11 40",
+    "4k3/3q1r2/1N2r1b1/3ppN2/2nPP3/1B1R2n1/2R1Q3/3K4 w - - 5 1",
+    "6k1/3b3r/1p1p4/p1n2p2/1PPNpP1q/P3Q1p1/1R1RB1P1/5K2 b - - 0 1",
+    "r2r1n2/pp2bk2/2p1p2p/3q4/3PN1QP/2P3R1/P4PP1/5RK1 w - - 0 1",
+    "8/8/8/8/5kp1/P7/8/1K1N4 w - - 0 1",
+    "8/8/8/5N2/8/p7/8/2NK3k w - - 0 1",
+    "8/3k4/8/8/8/4B3/4KB2/2B5 w - - 0 1",
+    "8/8/1P6/5pr1/8/4R3/7k/2K5 w - - 0 1",
+    "8/2p4P/8/kr6/6R1/8/8/1K6 w - - 0 1",
+    "8/8/3P3k/8/1p6/8/1P6/1K3n2 b - - 0 1",
+    "8/R7/2q5/8/6k1/8/1P5p/K6R w - - 0 124",
+    "8/8/8/8/8/6k1/6p1/6K1 w - - 0 1",
+    "7k/7P/6K1/8/3B4/8/8/8 b - - 0 1",
+]
+
+EVAL_TERMS = [
+    evaluation.evaluate_material,
+    evaluation.evaluate_game_phase,
+    evaluation.evaluate_piece_mobility,
+    evaluation.evaluate_development,
+    evaluation.evaluate_king_safety,
+    evaluation.evaluate_center_control,
+    evaluation.evaluate_pawn_structure,
+    evaluation.evaluate_castling,
+    evaluation.evaluate_piece_activation,
+    evaluation.evaluate_pawn_advances,
+    evaluation.evaluate_key_squares_control,
+    evaluation.evaluate_tactical_threats,
+    evaluation.detect_tactical_patterns,
+    evaluation.evaluate_king_endgame_activity,
+    evaluation.detect_endgame_advantage,
+    evaluation.evaluate_passed_pawns,
+    evaluation.evaluate_king_shield,
+    evaluation.evaluate_board_uncached,
+]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def reset_search_state():
+    # Every position starts from empty tables so the node counts are reproducible.
+    algorithm.transposition_table.clear()
+    evaluation.eval_cache.clear()
+    evaluation.pawn_hash.clear()
+
+
+def bench_search(depth, positions=BENCH_POSITIONS, verbose=True):
+    results = []
+    total_nodes = 0
+    total_time = 0.0
+    for index, fen in enumerate(positions):
+        reset_search_state()
+        stats = SearchStats()
+        start = time.time()
+        move = algorithm.iterative_deepening(chess.Board(fen), max_depth=depth, time_limit=float('inf'),
+                                             stats=stats)
+        elapsed = time.time() - start
+        total_nodes += stats.total_nodes
+        total_time += elapsed
+        results.append({
+            'fen': fen,
+            'move': move.uci() if move else None,
+            'score': stats.score,
+            'pv': [pv_move.uci() for pv_move in stats.pv],
+            'nodes': stats.nodes,
+            'qnodes': stats.qnodes,
+            'lazy_evals': stats.lazy_evals,
+            'lazy_exits': stats.lazy_exits,
+            'time': elapsed,
+            'time_to_depth': [iteration['time'] for iteration in stats.iterations],
+        })
+        if verbose:
+            print(f"{index + 1:3d}/{len(positions)} {move} nodes={stats.total_nodes} time={elapsed:.3f}s "
+                  f"pv={' '.join(pv_move.uci() for pv_move in stats.pv)}",
+                  file=sys.stderr)
+
+    return {
+        'mode': 'search',
+        'revision': git_revision(),
+        'depth': depth,
+        'positions': len(positions),
+        'nodes': total_nodes,
+        'time': total_time,
+        'nps': total_nodes / total_time if total_time else 0.0,
+        'results': results,
+    }
+
+
+MAX_SCORE_LOSS = 1000
+
+
+def move_score(fen, move, depth):
+    # Score of `move` for the side to move: minus the score of a search after it.
+    board = chess.Board(fen)
+    board.push_uci(move)
+    if board.is_checkmate():
+        return 999999
+    reset_search_state()
+    stats = SearchStats()
+    algorithm.iterative_deepening(board, max_depth=depth, time_limit=float('inf'), stats=stats)
+    return -stats.score if stats.score is not None else 0
+
+
+def bench_pruning(depth, enabled=(), disabled=(), positions=BENCH_POSITIONS):
+    # The same fixed-depth search with all forward pruning off and with the default PRUNING
+    # techniques plus `enabled` minus `disabled`. Strength is measured against the unpruned search: where
+    # the two pick different moves, both moves are scored by an unpruned search one ply
+    # shallower after them, and score_loss is how much worse the pruned search's move is,
+    # capped at MAX_SCORE_LOSS so a single missed mate does not swamp the mean.
+    algorithm.configure_pruning(disabled=list(algorithm.PRUNING))
+    try:
+        baseline = bench_search(depth, positions, verbose=False)
+    finally:
+        algorithm.configure_pruning(enabled, disabled)
+    pruned = bench_search(depth, positions, verbose=False)
+
+    results = []
+    algorithm.configure_pruning(disabled=list(algorithm.PRUNING))
+    try:
+        for base, result in zip(baseline['results'], pruned['results']):
+            loss = 0
+            if result['move'] != base['move'] and depth > 1:
+                loss = max(0, min(MAX_SCORE_LOSS, move_score(result['fen'], base['move'], depth - 1)
+                                  - move_score(result['fen'], result['move'], depth - 1)))
+            results.append({
+                'fen': result['fen'],
+                'move': result['move'],
+                'baseline_move': base['move'],
+                'nodes': result['nodes'] + result['qnodes'],
+                'baseline_nodes': base['nodes'] + base['qnodes'],
+                'score_loss': loss,
+            })
+    finally:
+        algorithm.configure_pruning(enabled, disabled)
+
+    same = sum(result['move'] == result['baseline_move'] for result in results)
+    return {
+        'mode': 'pruning',
+        'revision': git_revision(),
+        'depth': depth,
+        'positions': len(positions),
+        'pruning': [name for name, active in algorithm.PRUNING.items() if active],
+        'baseline_nodes': baseline['nodes'],
+        'nodes': pruned['nodes'],
+        'node_ratio': pruned['nodes'] / baseline['nodes'] if baseline['nodes'] else 0.0,
+        'baseline_time': baseline['time'],
+        'time': pruned['time'],
+        'same_move_rate': same / len(results) if results else 0.0,
+        'mean_score_loss': sum(result['score_loss'] for result in results) / len(results) if results else 0.0,
+        'results': results,
+    }
+
+
+def bench_eval(repeat, positions=BENCH_POSITIONS):
+    boards = [SearchBoard(fen) for fen in positions]
+    terms = {}
+    for term in EVAL_TERMS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for board in boards:
+                term(board)
+        elapsed = time.perf_counter() - start
+        terms[term.__name__] = elapsed / (repeat * len(boards)) * 1e6
+
+    return {
+        'mode': 'eval',
+        'revision': git_revision(),
+        'positions': len(boards),
+        'repeat': repeat,
+        'us_per_call': terms,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search and evaluation benchmarks.")
+    parser.add_argument('mode', choices=['search', 'eval', 'pruning'], nargs='?', default='search')
+    parser.add_argument('--depth', type=int, default=3, help="fixed search depth (search mode)")
+    parser.add_argument('--repeat', type=int, default=20, help="calls per position and term (eval mode)")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--eval-config', help="JSON file with evaluation term weights (see load_evaluation_config)")
+    parser.add_argument('--profile', action='store_true', help="time every evaluation term during the search")
+    parser.add_argument('--enable-pruning', action='append', default=[], choices=sorted(algorithm.PRUNING),
+                        help="switch on one forward pruning technique (repeatable)")
+    parser.add_argument('--disable-pruning', action='append', default=[], choices=sorted(algorithm.PRUNING),
+                        help="switch off one forward pruning technique (repeatable)")
+    args = parser.parse_args(argv)
+    algorithm.configure_pruning(args.enable_pruning, args.disable_pruning)
+
+    if args.eval_config:
+        evaluation.load_evaluation_config(args.eval_config)
+
+    if args.mode == 'search':
+        if args.profile:
+            evaluation.enable_profiling()
+        report = bench_search(args.depth)
+        print(f"depth {report['depth']}: {report['nodes']} nodes {report['time']:.2f}s "
+              f"{report['nps']:.0f} nps")
+        profile = evaluation.disable_profiling()
+        if profile:
+            report['profile'] = profile.as_dict()
+            print(f"{profile.evaluations} evaluations")
+            for name, calls, seconds, micros in profile.report():
+                print(f"{name:32s} {calls:8d} calls {seconds:8.3f}s {micros:8.1f} us/call")
+    elif args.mode == 'pruning':
+        report = bench_pruning(args.depth, args.enable_pruning, args.disable_pruning)
+        print(f"depth {report['depth']}: {report['baseline_nodes']} -> {report['nodes']} nodes "
+              f"({report['node_ratio']:.2f}x), {report['baseline_time']:.2f}s -> {report['time']:.2f}s, "
+              f"same move {report['same_move_rate']:.0%}, mean score loss {report['mean_score_loss']:.1f}")
+    else:
+        report = bench_eval(args.repeat)
+        for name, micros in sorted(report['us_per_call'].items(), key=lambda item: -item[1]):
+            print(f"{name:32s} {micros:10.1f} us/call")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
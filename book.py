@@ -0,0 +1,58 @@
+import random
+
+import chess
+import chess.polyglot
+
+from pieces import opening_book
+
+
+def _index_builtin_book():
+    # The small hand-written book in pieces.py, indexed by polyglot key instead of
+    # re-splitting every FEN on each probe. Moves are SAN or UCI strings.
+    index = {}
+    for fen, move_text in opening_book.items():
+        key = chess.polyglot.zobrist_hash(chess.Board(fen))
+        index.setdefault(key, []).append(move_text)
+    return index
+
+
+builtin_book = _index_builtin_book()
+
+
+def parse_book_move(board, move_text):
+    try:
+        move = chess.Move.from_uci(move_text)
+    except ValueError:
+        try:
+            return board.parse_san(move_text)
+        except ValueError:
+            return None
+    return move if board.is_legal(move) else None
+
+
+class OpeningBook:
+    # Probed once per move at the root. A polyglot .bin book is memory-mapped and
+    # binary-searched by zobrist key (chess.polyglot.MemoryMappedReader), so lookups stay
+    # cheap for books with hundreds of thousands of positions. Positions it does not cover
+    # fall back to the built-in book from pieces.py.
+    def __init__(self, path=None, seed=None):
+        self.reader = chess.polyglot.open_reader(path) if path else None
+        self.random = random.Random(seed)
+
+    def probe(self, board):
+        if self.reader is not None:
+            try:
+                return self.reader.weighted_choice(board, random=self.random).move
+            except IndexError:
+                pass
+
+        for move_text in builtin_book.get(chess.polyglot.zobrist_hash(board), ()):
+            move = parse_book_move(board, move_text)
+            if move:
+                return move
+        return None
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
@@ -3,12 +3,54 @@ import chess
 from chess import Board
 
 import random
-from algorithm import iterative_deepening
+import multiprocessing
+import threading
+from algorithm import iterative_deepening, transposition_table
+from evaluation import eval_cache, pawn_hash, load_evaluation_config
+from smp import ParallelSearch
+from book import OpeningBook
+from time_manager import TimeManager, DEFAULT_TIME_LIMIT
+from search_stats import SearchStats
+from search_context import SearchContext
 class ChessEngine:
-    def __init__(self):
+    def __init__(self, hash_mb=16, eval_cache_mb=4, pawn_hash_mb=1, workers=1, book_path=None, eval_config=None,
+                 ponder=False):
         # self.search_depth = search_depth
         self.elo = 1000
-        self.transposition_table = {}
+        # workers > 1 runs a Lazy SMP search, which needs the tables in shared memory. Once
+        # shared, a table may be mapped by another engine's helpers, so it is never resized
+        # or made private again: those helpers would keep writing to the old buffer.
+        if not transposition_table.shared and (hash_mb != transposition_table.size_mb or workers > 1):
+            transposition_table.resize(hash_mb, shared=workers > 1)
+        if not eval_cache.shared and (eval_cache_mb != eval_cache.size_mb or workers > 1):
+            eval_cache.resize(eval_cache_mb, shared=workers > 1)
+        if pawn_hash_mb != pawn_hash.size_mb:
+            pawn_hash.resize(pawn_hash_mb)
+        if eval_config:
+            # Term weights/toggles for this deployment; loaded before the SMP helpers start so they get them too.
+            load_evaluation_config(eval_config)
+        self.transposition_table = transposition_table
+        self.eval_cache = eval_cache
+        self.pawn_hash = pawn_hash
+        self.workers = workers
+        self.parallel_search = ParallelSearch(workers, transposition_table, eval_cache) if workers > 1 else None
+        self.opening_book = OpeningBook(book_path)
+        self.last_stats = None
+        # Killers, history and countermoves of this engine's game; engines in the same
+        # process never share them.
+        self.search_context = SearchContext()
+        # Pondering: after each move the engine searches the position after the reply its
+        # PV expects, in a background thread, until the opponent has moved (see ponder()).
+        self.ponder_enabled = ponder
+        self.ponder_move = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self._ponder_stop = multiprocessing.RawValue('b', 0)
+        self._ponder_thread = None
+        self._ponder_fen = None
+        self._ponder_limits = None
+        self._ponder_stats = None
+        self._ponder_result = None
 
     def is_valid_uci(self, move_uci, board):
         try:
@@ -17,12 +59,30 @@ class ChessEngine:
         except Exception:
             return False
 
-    def predict_move(self, board):
+    def predict_move(self, board, wtime=None, btime=None, winc=0.0, binc=0.0, movestogo=None, on_iteration=None):
+        # Clock arguments are in seconds; without them every move gets the default time_limit.
+        # The SearchStats of the search are kept in self.last_stats (None for book moves);
+        # on_iteration(stats) is called after every completed iteration.
+        self.last_stats = None
+        self.ponder_move = None
         try:
             # move = select_move(board)
             # if move:
             #     return move
-            return iterative_deepening(board)
+            limits = None
+            if wtime is not None or btime is not None:
+                limits = TimeManager(wtime=wtime, btime=btime, winc=winc, binc=binc, movestogo=movestogo,
+                                     turn=board.turn)
+            ponder_move = self._finish_pondering(board, limits)
+            if ponder_move:
+                return ponder_move
+            book_move = self.opening_book.probe(board)
+            if book_move:
+                return book_move
+            self.last_stats = SearchStats()
+            move = self._search(board, limits, self.last_stats, on_iteration)
+            self._expect_reply()
+            return move
         except Exception as e:
             print(f"Search error: {e}")
             legal_moves = list(board.legal_moves)
@@ -41,6 +101,69 @@ class ChessEngine:
             else:
                 return None
 
+    def _search(self, board, limits, stats, on_iteration=None):
+        if self.parallel_search:
+            return self.parallel_search.search(board, limits=limits, stats=stats, on_iteration=on_iteration,
+                                               context=self.search_context)
+        return iterative_deepening(board, limits=limits, stats=stats, on_iteration=on_iteration,
+                                   context=self.search_context)
+
+    def _expect_reply(self):
+        pv = self.last_stats.pv if self.last_stats else []
+        self.ponder_move = pv[1] if len(pv) > 1 else None
+
+    def ponder(self, board):
+        # Call right after this engine's move has been played on `board`. Returns whether a
+        # background search on the expected reply was started; the next predict_move either
+        # takes it over (ponder hit) or stops it (miss), keeping what it stored in the
+        # transposition table either way.
+        self.stop_pondering()
+        if not self.ponder_enabled or self.ponder_move is None or not board.is_legal(self.ponder_move):
+            return False
+        ponder_board = board.copy()
+        ponder_board.push(self.ponder_move)
+        if ponder_board.is_game_over():
+            return False
+        self._ponder_stop.value = 0
+        # No time limits until the ponder hit; only the stop flag ends a miss.
+        self._ponder_limits = TimeManager(stop_flag=self._ponder_stop)
+        self._ponder_stats = SearchStats()
+        self._ponder_fen = ponder_board.fen()
+        self._ponder_result = None
+        self._ponder_thread = threading.Thread(target=self._ponder_search, args=(ponder_board,), daemon=True)
+        self._ponder_thread.start()
+        return True
+
+    def _ponder_search(self, board):
+        try:
+            self._ponder_result = self._search(board, self._ponder_limits, self._ponder_stats)
+        except Exception as e:
+            print(f"Ponder error: {e}")
+
+    def _finish_pondering(self, board, limits):
+        # The pondered move on a hit, None otherwise.
+        if self._ponder_thread is None:
+            return None
+        if board.fen() != self._ponder_fen:
+            self.ponder_misses += 1
+            self.stop_pondering()
+            return None
+        self.ponder_hits += 1
+        # Without a clock the search gets iterative_deepening's default 5 seconds.
+        self._ponder_limits.ponder_hit(limits or TimeManager(time_limit=DEFAULT_TIME_LIMIT))
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        self.last_stats = self._ponder_stats
+        self._expect_reply()
+        return self._ponder_result
+
+    def stop_pondering(self):
+        if self._ponder_thread is None:
+            return
+        self._ponder_stop.value = 1
+        self._ponder_thread.join()
+        self._ponder_thread = None
+
     def calculate_elo(self, opponent, result, K=32):
         """Tính toán Elo với hệ số K điều chỉnh"""
         E1 = 1 / (1 + 10 ** ((opponent.elo - self.elo) / 400))
@@ -66,5 +189,14 @@ class ChessEngine:
     def play_game(self, opponent, result):
         self.elo, opponent.elo = self.calculate_elo(opponent, result)
 
-        # Reset transposition table sau mỗi trận đấu để tránh tràn bộ nhớ
-        self.transposition_table = {}
\ No newline at end of file
+        # Only this engine's own state is reset: the hash tables are shared with every other
+        # game in the process, and their entries age out through new_search().
+        self.stop_pondering()
+        self.search_context = SearchContext()
+
+    def close(self):
+        self.stop_pondering()
+        if self.parallel_search:
+            self.parallel_search.close()
+            self.parallel_search = None
+        self.opening_book.close()
\ No newline at end of file
@@ -0,0 +1,37 @@
+from transposition import HashTable
+
+SIGN_BIT = 1 << 63
+
+
+class EvalCache(HashTable):
+    # Direct-mapped cache of static evaluations keyed by zobrist key: a verification slot
+    # and the score, as a signed 64-bit integer, per position.
+    # Eviction: a store always replaces whatever occupies its slot, so the most recently
+    # evaluated position wins. Static evaluations are cheap to recompute compared with
+    # search results, so there is no depth or age preference as in the transposition table.
+    # Like the transposition table it can live in shared memory for the Lazy SMP workers.
+    def __init__(self, size_mb=4, shared=False):
+        super().__init__(size_mb, shared)
+
+    def reset_stats(self):
+        super().reset_stats()
+        self.evictions = 0
+
+    def probe(self, key):
+        self.probes += 1
+        data = self.load(key)
+        if data is None:
+            return None
+        self.hits += 1
+        bits = data[0]
+        return bits - (SIGN_BIT << 1) if bits & SIGN_BIT else bits
+
+    def store(self, key, score):
+        if self.slots[self.index(key) + 1] and self.load(key) is None:
+            self.evictions += 1
+        self.save(key, score & (SIGN_BIT << 1) - 1)
+
+    def stats(self):
+        stats = super().stats()
+        stats['evictions'] = self.evictions
+        return stats
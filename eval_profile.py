@@ -0,0 +1,36 @@
+import time
+
+
+class EvalProfile:
+    # Call counts and cumulative time per evaluation term. evaluate_tapered calls begin()
+    # once and lap(name) after each section, which charges the time since the previous mark
+    # to that section. Only active between evaluation.enable_profiling() and
+    # disable_profiling(), so a normal search pays a single None check per term.
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+        self.evaluations = 0
+        self.mark = 0.0
+
+    def begin(self):
+        self.evaluations += 1
+        self.mark = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + now - self.mark
+        self.mark = now
+
+    def report(self):
+        # Rows of (name, calls, total seconds, microseconds per call), most expensive first.
+        rows = [(name, self.calls[name], seconds, seconds / self.calls[name] * 1e6)
+                for name, seconds in self.seconds.items()]
+        return sorted(rows, key=lambda row: -row[2])
+
+    def as_dict(self):
+        return {
+            'evaluations': self.evaluations,
+            'terms': {name: {'calls': calls, 'seconds': seconds, 'us_per_call': micros}
+                      for name, calls, seconds, micros in self.report()},
+        }
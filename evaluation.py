@@ -1,5 +1,47 @@
+import json
+import random
 import chess
 from pieces import material_value, center_squares, PIECE_VALUES, KING_ENDGAME_VALUES
+from search_board import SearchBoard, PHASE_UNITS, FULL_PHASE_UNITS
+from eval_cache import EvalCache
+from pawn_hash import PawnHashTable, pawn_key
+from attack_map import AttackMap
+from eval_profile import EvalProfile
+eval_cache = EvalCache()
+pawn_hash = PawnHashTable()
+
+PHASE_SCALE = 256
+
+# evaluate_development depends on the move number, which the zobrist key does not cover,
+# so the cache key is salted with the move number bracket it uses.
+_rng = random.Random(20240501)
+DEVELOPMENT_KEYS = [_rng.getrandbits(64) for _ in range(4)]
+
+
+def _build_pawn_masks():
+    # Per-square masks for the pawn and king shield terms, indexed [color][square].
+    adjacent_files = [(chess.BB_FILES[f - 1] if f > 0 else 0) | (chess.BB_FILES[f + 1] if f < 7 else 0)
+                      for f in range(8)]
+    passed_spans = [[0] * 64, [0] * 64]
+    king_shields = [[0] * 64, [0] * 64]
+    for square in chess.SQUARES:
+        file = chess.square_file(square)
+        rank = chess.square_rank(square)
+        files = chess.BB_FILES[file] | adjacent_files[file]
+        for color in chess.COLORS:
+            ahead = range(rank + 1, 8) if color == chess.WHITE else range(rank)
+            for r in ahead:
+                passed_spans[color][square] |= files & chess.BB_RANKS[r]
+            shield_rank = rank + (1 if color == chess.WHITE else -1)
+            if 0 <= shield_rank < 8:
+                king_shields[color][square] = files & chess.BB_RANKS[shield_rank]
+    return adjacent_files, passed_spans, king_shields
+
+
+ADJACENT_FILES, PASSED_SPANS, KING_SHIELDS = _build_pawn_masks()
+# Files of the king and its neighbours, as a list of file masks per king square.
+KING_FILES = [[chess.BB_FILES[f] for f in (chess.square_file(sq) - 1, chess.square_file(sq), chess.square_file(sq) + 1)
+               if 0 <= f < 8] for sq in chess.SQUARES]
 def surrounding_squares(square):
     rank = chess.square_rank(square)
     file = chess.square_file(square)
@@ -23,25 +65,33 @@ def get_positional_value(piece_type, color, square):
     return 0
 
 
-def evaluate_material(board):
-    score = 0
-    game_phase = evaluate_game_phase(board)
+def material_scores(board):
+    # Material plus piece-square values at the midgame and endgame ends of the taper. They
+    # only differ by the king's square value, which is 0 in the midgame.
+    if isinstance(board, SearchBoard):
+        # Totals are kept up to date on push/pop.
+        return board.material, board.material + board.king_endgame
 
+    score = 0
+    king_endgame = 0
     for square in chess.SQUARES:
         piece = board.piece_at(square)
         if piece:
             piece_type = piece.piece_type
-            value = material_value.get(piece_type, 0)
-            position_value = get_positional_value(piece_type, piece.color, square)
-
+            value = material_value.get(piece_type, 0) + get_positional_value(piece_type, piece.color, square)
             if piece_type == chess.KING:
-                mg_value = position_value
-                eg_value = KING_ENDGAME_VALUES[square] if 0 <= square < 64 else 0
-                position_value = mg_value * game_phase + eg_value * (1 - game_phase)
+                king_endgame += KING_ENDGAME_VALUES[square] if piece.color == chess.WHITE \
+                    else -KING_ENDGAME_VALUES[square]
 
-            score += (value + position_value) if piece.color == chess.WHITE else -(value + position_value)
+            score += value if piece.color == chess.WHITE else -value
 
-    return score
+    return score, score + king_endgame
+
+
+def evaluate_material(board):
+    mg, eg = material_scores(board)
+    phase = evaluate_game_phase(board)
+    return mg * phase + eg * (1 - phase)
 
 
 def evaluate_pawn_advances(board):
@@ -80,95 +130,84 @@ def evaluate_pawn_advances(board):
     return score
 
 
-def evaluate_key_squares_control(board):
-    score = 0
-
-    key_squares = [
-        chess.D4, chess.E4, chess.D5, chess.E5,
-        chess.C3, chess.F3, chess.C6, chess.F6,
-        chess.D3, chess.E3, chess.D6, chess.E6
-    ]
+KEY_SQUARES = chess.SquareSet([
+    chess.D4, chess.E4, chess.D5, chess.E5,
+    chess.C3, chess.F3, chess.C6, chess.F6,
+    chess.D3, chess.E3, chess.D6, chess.E6
+]).mask
+CENTER_MASK = chess.SquareSet(center_squares).mask
 
-    for square in key_squares:
 
-        if board.is_attacked_by(chess.WHITE, square):
-            score += 15
-            piece = board.piece_at(square)
-            if piece and piece.color == chess.WHITE:
-                score += 25
+def evaluate_key_squares_control(board, attacks=None):
+    if attacks is None:
+        attacks = AttackMap(board)
+    score = 0
 
-        if board.is_attacked_by(chess.BLACK, square):
-            score -= 15
-            piece = board.piece_at(square)
-            if piece and piece.color == chess.BLACK:
-                score -= 25
+    for color in [chess.WHITE, chess.BLACK]:
+        controlled = KEY_SQUARES & attacks.attacked[color]
+        control = 15 * chess.popcount(controlled) + 25 * chess.popcount(controlled & board.occupied_co[color])
+        score += control if color == chess.WHITE else -control
 
     return score
 
 
-def evaluate_piece_mobility(board):
+MOBILITY_WEIGHTS = [0, 10, 25, 30, 40, 50, 0]
+MOBILITY_CENTER = chess.BB_FILE_C | chess.BB_FILE_D | chess.BB_FILE_E | chess.BB_FILE_F
+MOBILITY_CENTER &= chess.BB_RANK_3 | chess.BB_RANK_4 | chess.BB_RANK_5 | chess.BB_RANK_6
+
+
+def evaluate_piece_mobility(board, attacks=None):
+    # Counted from attack sets rather than legal moves, so the board is never touched.
+    # Pieces only count squares not occupied by their own side or attacked by enemy pawns,
+    # the king only squares the enemy does not attack, pawns their pushes and captures.
+    if attacks is None:
+        attacks = AttackMap(board)
     score = 0
-    original_turn = board.turn
-
-    mobility_weights = {
-        chess.PAWN: 10,
-        chess.KNIGHT: 25,
-        chess.BISHOP: 30,
-        chess.ROOK: 40,
-        chess.QUEEN: 50
-    }
+    empty = ~board.occupied
 
     for color in [chess.WHITE, chess.BLACK]:
-        mobility = 0
-        board.turn = color
-        for move in board.legal_moves:
-            piece = board.piece_at(move.from_square)
-            if piece:
-                mobility += mobility_weights.get(piece.piece_type, 0)
-
-                to_file = chess.square_file(move.to_square)
-                to_rank = chess.square_rank(move.to_square)
-                if 2 <= to_file <= 5 and 2 <= to_rank <= 5:
-                    mobility += 10
-
-                if board.piece_at(move.to_square):
-                    if piece.piece_type != chess.KNIGHT:
-                        mobility += 20
-                    else:
-                        mobility += 10
+        enemy = board.occupied_co[not color]
+        safe = ~board.occupied_co[color] & ~attacks.pawn_attacks[not color]
+        king_safe = ~board.occupied_co[color] & ~attacks.attacked[not color]
+
+        pawns = board.pawns & board.occupied_co[color]
+        if color == chess.WHITE:
+            pushes = chess.shift_up(pawns) & empty
+            pushes |= chess.shift_up(pushes & chess.BB_RANK_3) & empty
+        else:
+            pushes = chess.shift_down(pawns) & empty
+            pushes |= chess.shift_down(pushes & chess.BB_RANK_6) & empty
+        mobility = MOBILITY_WEIGHTS[chess.PAWN] * chess.popcount(pushes) + 10 * chess.popcount(pushes & MOBILITY_CENTER)
+
+        for piece_type, square, piece_attacks in attacks.pieces[color]:
+            if piece_type == chess.PAWN:
+                targets = piece_attacks & enemy
+            elif piece_type == chess.KING:
+                targets = piece_attacks & king_safe
+            else:
+                targets = piece_attacks & safe
+            if not targets:
+                continue
+            mobility += MOBILITY_WEIGHTS[piece_type] * chess.popcount(targets)
+            mobility += 10 * chess.popcount(targets & MOBILITY_CENTER)
+            mobility += (10 if piece_type == chess.KNIGHT else 20) * chess.popcount(targets & enemy)
 
         score += mobility if color == chess.WHITE else -mobility
 
-    board.turn = original_turn
     return score
 
 
 def evaluate_king_safety(board):
     score = 0
-    phase = evaluate_game_phase(board)
 
     for color in [chess.WHITE, chess.BLACK]:
         king_square = board.king(color)
         if king_square is None:
             continue
 
-        file = chess.square_file(king_square)
-        open_file_penalty = 0
-        shield_bonus = 0
-
-        for f in (file - 1, file, file + 1):
-            if 0 <= f < 8:
-                if all(board.piece_at(chess.square(f, r)) != chess.Piece(chess.PAWN, color) for r in range(8)):
-                    open_file_penalty += 500
-
-        shield_rank = chess.square_rank(king_square) + (1 if color == chess.WHITE else -1)
-        if 0 <= shield_rank < 8:
-            for df in [-1, 0, 1]:
-                shield_file = file + df
-                if 0 <= shield_file < 8:
-                    piece = board.piece_at(chess.square(shield_file, shield_rank))
-                    if piece and piece.piece_type == chess.PAWN and piece.color == color:
-                        shield_bonus += 300
+        pawns = board.pawns & board.occupied_co[color]
+        open_file_penalty = 500 * sum(1 for file_mask in KING_FILES[king_square] if not pawns & file_mask)
+        shield_bonus = 300 * chess.popcount(pawns & KING_SHIELDS[color][king_square])
 
         safety_score = shield_bonus - open_file_penalty
         score += safety_score if color == chess.WHITE else -safety_score
@@ -202,47 +241,49 @@ def static_exchange_evaluation(board, move):
     return max(0, gain - recapture_value)
 
 
-def evaluate_pawn_structure(board):
-    score = 0
-    phase = evaluate_game_phase(board)
-
+def evaluate_pawn_entry(board):
+    # The pawn-only part of the pawn terms, cached in the pawn hash: doubled and isolated
+    # penalties, the passed pawn rank bonus before it is scaled by the game phase, and the
+    # passed pawns of each side. Scores are from white's point of view.
+    structure = 0
+    passed_base = 0
+    passed = [0, 0]
     for color in [chess.WHITE, chess.BLACK]:
-        pawns = list(board.pieces(chess.PAWN, color))
-        files = [chess.square_file(p) for p in pawns]
-        file_count = {f: files.count(f) for f in set(files)}
+        pawns = board.pawns & board.occupied_co[color]
+        enemy_pawns = board.pawns & board.occupied_co[not color]
 
-        doubled_penalty = sum(30 for count in file_count.values() if count > 1)
-        isolated_penalty = sum(25 * file_count[f] for f in range(8) if
-                               file_count.get(f, 0) and file_count.get(f - 1, 0) + file_count.get(f + 1, 0) == 0)
+        penalty = 0
+        for file in range(8):
+            count = chess.popcount(pawns & chess.BB_FILES[file])
+            if count > 1:
+                penalty += 30
+            if count and not pawns & ADJACENT_FILES[file]:
+                penalty += 25 * count
 
-        passed_bonus = 0
-        for pawn_sq in pawns:
-            file = chess.square_file(pawn_sq)
-            rank = chess.square_rank(pawn_sq)
-            is_passed = True
+        bonus = 0
+        for pawn_sq in chess.scan_forward(pawns):
+            if not enemy_pawns & PASSED_SPANS[color][pawn_sq]:
+                passed[color] |= chess.BB_SQUARES[pawn_sq]
+                bonus += 50 + chess.square_rank(pawn_sq) * 10
 
-            if color == chess.WHITE:
-                for r in range(rank + 1, 8):
-                    if any(board.piece_at(chess.square(f, r)) and board.piece_at(
-                            chess.square(f, r)).piece_type == chess.PAWN and board.piece_at(
-                            chess.square(f, r)).color != color for f in (file - 1, file, file + 1) if 0 <= f < 8):
-                        is_passed = False
-                        break
-            else:
-                for r in range(rank):
-                    if any(board.piece_at(chess.square(f, r)) and board.piece_at(
-                            chess.square(f, r)).piece_type == chess.PAWN and board.piece_at(
-                            chess.square(f, r)).color != color for f in (file - 1, file, file + 1) if 0 <= f < 8):
-                        is_passed = False
-                        break
+        structure += -penalty if color == chess.WHITE else penalty
+        passed_base += bonus if color == chess.WHITE else -bonus
 
-            if is_passed:
-                passed_bonus += (50 + rank * 10) * phase
+    return structure, passed_base, passed[chess.WHITE], passed[chess.BLACK]
 
-        pawn_score = passed_bonus - (doubled_penalty + isolated_penalty)
-        score += pawn_score if color == chess.WHITE else -pawn_score
 
-    return score
+def probe_pawn_entry(board):
+    key = pawn_key(board)
+    entry = pawn_hash.probe(key)
+    if entry is None:
+        entry = evaluate_pawn_entry(board)
+        pawn_hash.store(key, *entry)
+    return entry
+
+
+def evaluate_pawn_structure(board):
+    structure, passed_base, _, _ = probe_pawn_entry(board)
+    return structure + passed_base * evaluate_game_phase(board)
 
 
 def evaluate_piece_activation(board):
@@ -293,58 +334,39 @@ def evaluate_piece_activation(board):
 
 def evaluate_passed_pawns(board):
     score = 0
+    _, _, white_passed, black_passed = probe_pawn_entry(board)
     for color in [chess.WHITE, chess.BLACK]:
-        pawns = list(board.pieces(chess.PAWN, color))
-        for pawn_sq in pawns:
+        for pawn_sq in chess.scan_forward(white_passed if color == chess.WHITE else black_passed):
             file = chess.square_file(pawn_sq)
             rank = chess.square_rank(pawn_sq)
-            is_passed = True
             if color == chess.WHITE:
-                blocker_ranks = range(rank + 1, 8)
+                base_value = 20 * (rank + 1)
                 promotion_distance = 7 - rank
             else:
-                blocker_ranks = range(0, rank)
+                base_value = 20 * (8 - rank)
                 promotion_distance = rank
 
-            for r in blocker_ranks:
-                for f in [file - 1, file, file + 1]:
-                    if 0 <= f < 8:
-                        blocker_sq = chess.square(f, r)
-                        blocker = board.piece_at(blocker_sq)
-                        if blocker and blocker.piece_type == chess.PAWN and blocker.color != color:
-                            is_passed = False
-                            break
-                if not is_passed:
-                    break
-
-            if is_passed:
-                if color == chess.WHITE:
-                    base_value = 20 * (rank + 1)
-                else:
-                    base_value = 20 * (8 - rank)
-
-                if (color == chess.WHITE and rank >= 5) or (color == chess.BLACK and rank <= 2):
-                    base_value *= 2
+            if (color == chess.WHITE and rank >= 5) or (color == chess.BLACK and rank <= 2):
+                base_value *= 2
 
-                king_sq = board.king(color)
-                if king_sq:
-                    king_distance = manhattan_distance(king_sq, pawn_sq)
-                    base_value += (7 - king_distance) * 10
+            king_sq = board.king(color)
+            if king_sq:
+                king_distance = manhattan_distance(king_sq, pawn_sq)
+                base_value += (7 - king_distance) * 10
 
-                opponent_king_sq = board.king(not color)
-                if opponent_king_sq:
-                    promotion_sq = chess.square(file, 7 if color == chess.WHITE else 0)
-                    opponent_king_distance = manhattan_distance(opponent_king_sq, promotion_sq)
+            opponent_king_sq = board.king(not color)
+            if opponent_king_sq:
+                promotion_sq = chess.square(file, 7 if color == chess.WHITE else 0)
+                opponent_king_distance = manhattan_distance(opponent_king_sq, promotion_sq)
 
-                    if opponent_king_distance > promotion_distance + (0 if board.turn == color else 1):
-                        base_value *= 3
+                if opponent_king_distance > promotion_distance + (0 if board.turn == color else 1):
+                    base_value *= 3
 
-                score += base_value if color == chess.WHITE else -base_value
+            score += base_value if color == chess.WHITE else -base_value
 
     return score
 
 
-
 def evaluate_development(board):
     score = 0
 
@@ -454,21 +476,8 @@ def evaluate_king_shield(board):
         king_square = board.king(color)
         if king_square is None:
             continue
-        file = chess.square_file(king_square)
-        rank = chess.square_rank(king_square)
-
-        shield_squares = []
-        if color == chess.WHITE:
-            if rank + 1 < 8:
-                shield_squares = [chess.square(f, rank + 1) for f in (file - 1, file, file + 1) if 0 <= f < 8]
-        else:
-            if rank - 1 >= 0:
-                shield_squares = [chess.square(f, rank - 1) for f in (file - 1, file, file + 1) if 0 <= f < 8]
-
-        shield_pawns = sum(1 for sq in shield_squares if
-                           board.piece_at(sq) and board.piece_at(sq).piece_type == chess.PAWN and board.piece_at(
-                               sq).color == color)
 
+        shield_pawns = chess.popcount(board.pawns & board.occupied_co[color] & KING_SHIELDS[color][king_square])
         if shield_pawns < 2:
             if color == chess.WHITE:
                 score -= 100
@@ -477,56 +486,25 @@ def evaluate_king_shield(board):
     return score
 
 
-def evaluate_tactical_threats(board):
+def evaluate_tactical_threats(board, attacks=None):
+    # Scored for the side to move from the moves in the attack map, without making them:
+    # winning captures, forks of two pieces worth a minor piece or more, checks, promotions.
+    if attacks is None:
+        attacks = AttackMap(board)
     score = 0
+    high_value = board.occupied_co[not board.turn] & ~board.pawns
 
-    for move in board.legal_moves:
-        from_sq = move.from_square
-        to_sq = move.to_square
-        piece = board.piece_at(from_sq)
-        target = board.piece_at(to_sq)
-        if target and piece:
-            gain = material_value.get(target.piece_type, 0)
-            cost = material_value.get(piece.piece_type, 0)
+    for piece_type, _, _, promotion, victim_type, gives_check, piece_attacks in attacks.moves():
+        if victim_type:
+            gain = material_value[victim_type]
+            cost = material_value[piece_type]
             if gain > cost:
-                score += (gain - cost)
-        try:
-            board.push(move)
-            if piece:
-                attacked = []
-                try:
-                    attacked = list(board.attacks(to_sq))
-                except Exception:
-                    pass
-
-                high_value_targets = [
-                    sq for sq in attacked if board.piece_at(sq) and
-                                             board.piece_at(sq).color != piece.color and
-                                             material_value.get(board.piece_at(sq).piece_type, 0) >= 300
-                ]
-                if len(high_value_targets) >= 2:
-                    score += 1500
-
-            if board.is_check():
-                score += 200
-
-            if piece and piece.piece_type in [chess.BISHOP, chess.ROOK, chess.QUEEN]:
-                for pinned_sq in board.attacked_by(piece.color, to_sq):
-                    pinned_piece = board.piece_at(pinned_sq)
-                    if pinned_piece and pinned_piece.color != piece.color:
-                        try:
-                            if board.is_pinned(pinned_piece.color, pinned_sq):
-                                score += 1000
-                                break
-                        except Exception:
-                            pass
-            board.pop()
-        except Exception:
-            if board.move_stack and move == board.peek():
-                board.pop()
-            continue
-
-        if move.promotion:
+                score += gain - cost
+        if chess.popcount(piece_attacks & high_value) >= 2:
+            score += 1500
+        if gives_check:
+            score += 200
+        if promotion:
             score += 1000
 
     return score
@@ -538,35 +516,32 @@ def manhattan_distance(sq1, sq2):
     return abs(x1 - x2) + abs(y1 - y2)
 
 
-def evaluate_game_phase(board):
-    total_phase = 24
+def game_phase(board):
+    # Integer phase from PHASE_SCALE with all pieces on the board down to 0 with only pawns
+    # and kings left (queen 4, rook 2, minor piece 1, out of 24).
+    if isinstance(board, SearchBoard):
+        units = board.phase_units
+    else:
+        units = sum(PHASE_UNITS[piece_type] * chess.popcount(board.pieces_mask(piece_type, chess.WHITE)
+                                                             | board.pieces_mask(piece_type, chess.BLACK))
+                    for piece_type in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN))
+    return min(units, FULL_PHASE_UNITS) * PHASE_SCALE // FULL_PHASE_UNITS
 
-    phase = total_phase
-    phase -= 4 - len(board.pieces(chess.QUEEN, chess.WHITE)) - len(board.pieces(chess.QUEEN, chess.BLACK))
-    phase -= (4 - len(board.pieces(chess.ROOK, chess.WHITE)) - len(board.pieces(chess.ROOK, chess.BLACK))) * 0.5
-    phase -= (4 - len(board.pieces(chess.BISHOP, chess.WHITE)) - len(board.pieces(chess.BISHOP, chess.BLACK))) * 0.33
-    phase -= (4 - len(board.pieces(chess.KNIGHT, chess.WHITE)) - len(board.pieces(chess.KNIGHT, chess.BLACK))) * 0.33
-    return max(0, min(1, phase / total_phase))
 
+def evaluate_game_phase(board):
+    return game_phase(board) / PHASE_SCALE
 
-def evaluate_center_control(board):
-    score = 0
 
-    control_white = 0
-    control_black = 0
+def evaluate_center_control(board, attacks=None):
+    if attacks is None:
+        attacks = AttackMap(board)
+    score = 0
 
-    for sq in center_squares:
-        if board.is_attacked_by(chess.WHITE, sq):
-            control_white += 1
-        if board.is_attacked_by(chess.BLACK, sq):
-            control_black += 1
+    control_white = chess.popcount(CENTER_MASK & attacks.attacked[chess.WHITE])
+    control_black = chess.popcount(CENTER_MASK & attacks.attacked[chess.BLACK])
 
-        piece = board.piece_at(sq)
-        if piece:
-            if piece.color == chess.WHITE:
-                score += 1000
-            else:
-                score -= 1000
+    score += 1000 * (chess.popcount(CENTER_MASK & board.occupied_co[chess.WHITE])
+                     - chess.popcount(CENTER_MASK & board.occupied_co[chess.BLACK]))
 
     score += (control_white - control_black) * 20
 
@@ -578,37 +553,18 @@ def evaluate_center_control(board):
     return score
 
 
-def detect_tactical_patterns(board):
+def detect_tactical_patterns(board, attacks=None):
+    if attacks is None:
+        attacks = AttackMap(board)
     score = 0
-    legal_moves = list(board.legal_moves)
-
-    for move in legal_moves:
-        is_capture = board.is_capture(move)
-        gives_check = board.gives_check(move)
-
-        if is_capture:
-            attacker = board.piece_at(move.from_square)
-            victim = board.piece_at(move.to_square)
-            if attacker and victim:
-                attacker_value = material_value.get(attacker.piece_type, 0)
-                victim_value = material_value.get(victim.piece_type, 0)
-                if victim_value > attacker_value:
-                    score += 50
 
+    for piece_type, _, _, _, victim_type, gives_check, piece_attacks in attacks.moves():
+        if victim_type and material_value[victim_type] > material_value[piece_type]:
+            score += 50
         if gives_check:
             score += 50
-
-        try:
-            board.push(move)
-            if not board.is_game_over():
-                attacked_squares = list(board.attacks(move.to_square))
-                if len(attacked_squares) >= 2:
-                    score += 20
-            board.pop()
-        except Exception as e:
-            if board.move_stack:
-                board.pop()
-            continue
+        if piece_attacks & (piece_attacks - 1):
+            score += 20
 
     return score
 
@@ -627,29 +583,28 @@ def detect_endgame_advantage(board):
 
 
 def evaluate_king_endgame_activity(board):
+    # Only weighted at the endgame end of the taper (see TERM_WEIGHTS).
     score = 0
-    phase = evaluate_game_phase(board)
-    if phase < 0.3:
-        white_king = board.king(chess.WHITE)
-        black_king = board.king(chess.BLACK)
+    white_king = board.king(chess.WHITE)
+    black_king = board.king(chess.BLACK)
 
-        if white_king is not None:
-            white_center_distance = min(manhattan_distance(white_king, center_sq) for center_sq in center_squares)
-            score += (7 - white_center_distance) * 20
+    if white_king is not None:
+        white_center_distance = min(manhattan_distance(white_king, center_sq) for center_sq in center_squares)
+        score += (7 - white_center_distance) * 20
 
-        if black_king is not None:
-            black_center_distance = min(manhattan_distance(black_king, center_sq) for center_sq in center_squares)
-            score -= (7 - black_center_distance) * 20
+    if black_king is not None:
+        black_center_distance = min(manhattan_distance(black_king, center_sq) for center_sq in center_squares)
+        score -= (7 - black_center_distance) * 20
 
-        if white_king is not None:
-            white_rank = chess.square_rank(white_king)
-            if white_rank <= 1:
-                score -= 100
+    if white_king is not None:
+        white_rank = chess.square_rank(white_king)
+        if white_rank <= 1:
+            score -= 100
 
-        if black_king is not None:
-            black_rank = chess.square_rank(black_king)
-            if black_rank >= 6:
-                score += 100
+    if black_king is not None:
+        black_rank = chess.square_rank(black_king)
+        if black_rank >= 6:
+            score += 100
 
     return score
 
@@ -746,57 +701,239 @@ def evaluate_king_endgame_activity(board):
 #     return defense_score
 
 
-def evaluate_board(board):
-    if board.is_checkmate():
-        return -999999 if board.turn == chess.WHITE else 999999
-    if board.is_stalemate() or board.is_insufficient_material():
-        return 0
-
-    phase = evaluate_game_phase(board)
-
-    material = evaluate_material(board) * 1.0
-
-    if phase > 0.7:
-        return material + \
-            evaluate_piece_mobility(board) * 0.8 + \
-            evaluate_development(board) * 2.5 + \
-            evaluate_king_safety(board) * 2.0 + \
-            evaluate_center_control(board) * 2.0 + \
-            evaluate_pawn_structure(board) * 0.7 + \
-            evaluate_castling(board) * 2.0 + \
-            evaluate_piece_activation(board) * 2.5 + \
-            evaluate_pawn_advances(board) * 1.5 + \
-            evaluate_key_squares_control(board) * 1.8
-            # queen_trade(board) * 0.1 + \
-            # attack_strength(board) * 0.7 + \
-            # defense_strength(board) * 1.2
-
-
-    elif phase > 0.3:
-        return material + \
-            evaluate_piece_mobility(board) * 2 + \
-            evaluate_tactical_threats(board) * 1.8 + \
-            evaluate_king_safety(board) * 2 + \
-            evaluate_pawn_structure(board) * 1.2 + \
-            evaluate_center_control(board) * 1.5 + \
-            detect_tactical_patterns(board) * 1.5 + \
-            evaluate_key_squares_control(board) * 1.2
-            # encourage_rook_on_open_file(board) * 1.5 + \
-            # attack_strength(board) * 1 + \
-            # defense_strength(board) * 1.3 + \
-            # queen_trade(board) * 0.5
-
+def eval_cache_key(board):
+    fullmove_number = board.fullmove_number
+    if fullmove_number <= 5:
+        bracket = 0
+    elif fullmove_number <= 8:
+        bracket = 1
+    elif fullmove_number <= 15:
+        bracket = 2
     else:
-        return material + \
-            evaluate_piece_mobility(board) * 1.8 + \
-            evaluate_king_endgame_activity(board) * 3.0 + \
-            evaluate_pawn_structure(board) * 2.5 + \
-            detect_endgame_advantage(board) * 2.0 + \
-            evaluate_passed_pawns(board) * 3.0 + \
-            evaluate_pawn_advances(board) * 0.5
+        bracket = 3
+    return board.zobrist_key ^ DEVELOPMENT_KEYS[bracket]
 
-            # attack_strength(board) * 0.8 + \
-            # defense_strength(board) * 1.3 + \
-            # encourage_rook_on_open_file(board) * 1.8 + \
+
+def terminal_score(board):
+    # Checkmate from white's point of view, 0 for stalemate or a dead position, None when
+    # the game goes on. The search finds these from its own move generation instead.
+    if board.is_insufficient_material():
+        return 0
+    if any(board.generate_legal_moves()):
+        return None
+    if board.is_check():
+        return -999999 if board.turn == chess.WHITE else 999999
+    return 0
 
 
+def evaluate_board(board, alpha=None, beta=None):
+    score = terminal_score(board)
+    if score is not None:
+        return score
+    return evaluate_position(board, alpha, beta)
+
+
+def evaluate_position(board, alpha=None, beta=None, stats=None):
+    # Static evaluation of a position the caller knows is not terminal.
+    # With an alpha/beta window (from white's point of view) the evaluation stops as soon as
+    # the terms left cannot bring the score into the window. It then returns the proven bound
+    # (an upper bound <= alpha or a lower bound >= beta), which is only good enough to fail
+    # low or high, so it is not cached.
+    if isinstance(board, SearchBoard):
+        key = eval_cache_key(board)
+        score = eval_cache.probe(key)
+        if score is None:
+            score, complete = evaluate_tapered(board, alpha, beta, stats)
+            if complete:
+                eval_cache.store(key, score)
+        return score
+    return evaluate_tapered(board, alpha, beta, stats)[0]
+
+
+def evaluate_board_uncached(board):
+    score = terminal_score(board)
+    if score is not None:
+        return score
+    return evaluate_tapered(board)[0]
+
+
+def evaluate_tapered(board, alpha=None, beta=None, stats=None):
+    # Returns (score, complete); complete is False after a lazy exit. Terminal positions
+    # are not detected here (see terminal_score). Windowed evaluations and lazy exits are
+    # counted on `stats`, the SearchStats of the calling search, if given.
+    profile = eval_profile
+    if profile is not None:
+        profile.begin()
+
+    phase = game_phase(board)
+    lazy = LAZY_EVAL and alpha is not None
+    if lazy and stats is not None:
+        stats.lazy_evals += 1
+
+    # One pass over all terms, accumulating integer midgame and endgame scores in
+    # hundredths, then interpolated by the phase. Terms run cheapest first and the attack
+    # map is only built when the first term that needs it is reached.
+    mg, eg = material_scores(board)
+    mg *= 100
+    eg *= 100
+    if profile is not None:
+        profile.lap('evaluate_material')
+
+    mg_weight, eg_weight = TERM_WEIGHTS['evaluate_pawn_structure']
+    if mg_weight or eg_weight:
+        structure, passed_base, _, _ = probe_pawn_entry(board)
+        mg += (structure + passed_base) * mg_weight
+        eg += structure * eg_weight
+        if profile is not None:
+            profile.lap('evaluate_pawn_structure')
+
+    attacks = None
+    for (term, uses_attacks), (margin_mg, margin_eg) in zip(TAPERED_TERMS, lazy_margins):
+        mg_weight, eg_weight = TERM_WEIGHTS[term.__name__]
+        if not mg_weight and not eg_weight:
+            continue
+        if lazy:
+            score = (mg * phase + eg * (PHASE_SCALE - phase)) // (100 * PHASE_SCALE)
+            margin = (margin_mg * phase + margin_eg * (PHASE_SCALE - phase)) // (100 * PHASE_SCALE)
+            # Return the bound the exit proves, not the partial score: callers such as
+            # delta pruning in quiescence must not treat the position as worse than it can be.
+            if score + margin <= alpha:
+                if stats is not None:
+                    stats.lazy_exits += 1
+                return score + margin, False
+            if score - margin >= beta:
+                if stats is not None:
+                    stats.lazy_exits += 1
+                return score - margin, False
+
+        if uses_attacks:
+            if attacks is None:
+                attacks = AttackMap(board)
+                if profile is not None:
+                    profile.lap('AttackMap')
+            value = term(board, attacks)
+        else:
+            value = term(board)
+        mg += value * mg_weight
+        eg += value * eg_weight
+        if profile is not None:
+            profile.lap(term.__name__)
+
+    return (mg * phase + eg * (PHASE_SCALE - phase)) // (100 * PHASE_SCALE), True
+
+
+# Weight of each term in hundredths at the midgame (all pieces on) and endgame (pawns and
+# kings only) ends of the taper: the former opening and endgame term sets. The two tactical
+# terms were only in the former middlegame set; they keep its weights at both ends, so they
+# count as much in the middle of the game as before.
+TERM_WEIGHTS = {
+    'evaluate_pawn_structure': (70, 250),
+    'evaluate_piece_mobility': (80, 180),
+    'evaluate_development': (250, 0),
+    'evaluate_king_safety': (200, 0),
+    'evaluate_center_control': (200, 0),
+    'evaluate_castling': (200, 0),
+    'evaluate_piece_activation': (250, 0),
+    'evaluate_pawn_advances': (150, 50),
+    'evaluate_key_squares_control': (180, 0),
+    'evaluate_tactical_threats': (180, 180),
+    'detect_tactical_patterns': (150, 150),
+    'evaluate_king_endgame_activity': (0, 300),
+    'detect_endgame_advantage': (0, 200),
+    'evaluate_passed_pawns': (0, 300),
+}
+
+# (term, takes the attack map), cheapest first; material and pawn structure are added
+# separately above.
+TAPERED_TERMS = [
+    (evaluate_castling, False),
+    (evaluate_king_safety, False),
+    (evaluate_development, False),
+    (evaluate_piece_activation, False),
+    (evaluate_king_endgame_activity, False),
+    (evaluate_passed_pawns, False),
+    (detect_endgame_advantage, False),
+    (evaluate_pawn_advances, False),
+    (evaluate_center_control, True),
+    (evaluate_key_squares_control, True),
+    (evaluate_piece_mobility, True),
+    (evaluate_tactical_threats, True),
+    (detect_tactical_patterns, True),
+]
+
+# Bound on |value| of each term for lazy evaluation: exact where the term is bounded by
+# construction, otherwise the largest value seen on 31742 positions from random games
+# started from the bench positions, rounded up.
+LAZY_MARGINS = {
+    'evaluate_castling': 4000,
+    'evaluate_king_safety': 2400,
+    'evaluate_development': 240,
+    'evaluate_piece_activation': 305,
+    'evaluate_king_endgame_activity': 240,
+    'evaluate_passed_pawns': 2500,
+    'detect_endgame_advantage': 100,
+    'evaluate_pawn_advances': 320,
+    'evaluate_center_control': 4180,
+    'evaluate_key_squares_control': 480,
+    'evaluate_piece_mobility': 2800,
+    'evaluate_tactical_threats': 36000,
+    'detect_tactical_patterns': 2200,
+}
+LAZY_EVAL = True
+
+
+def compute_lazy_margins():
+    # (midgame, endgame) weighted margin of the terms from each position in TAPERED_TERMS on.
+    margins = []
+    margin_mg = margin_eg = 0
+    for term, _ in reversed(TAPERED_TERMS):
+        mg_weight, eg_weight = TERM_WEIGHTS[term.__name__]
+        margin_mg += LAZY_MARGINS[term.__name__] * mg_weight
+        margin_eg += LAZY_MARGINS[term.__name__] * eg_weight
+        margins.append((margin_mg, margin_eg))
+    return margins[::-1]
+
+
+lazy_margins = compute_lazy_margins()
+DEFAULT_TERM_WEIGHTS = dict(TERM_WEIGHTS)
+eval_profile = None
+
+
+def configure_evaluation(weights=None, disabled=(), lazy=None):
+    # Runtime term selection: `weights` maps term names to (midgame, endgame) weights in
+    # hundredths, `disabled` lists terms to skip (weight 0). Terms not mentioned get their
+    # default weights back. Cached scores are dropped since they used the old weights.
+    global LAZY_EVAL, lazy_margins
+    for name in list(weights or ()) + list(disabled):
+        if name not in DEFAULT_TERM_WEIGHTS:
+            raise ValueError(f"unknown evaluation term: {name}")
+    TERM_WEIGHTS.update(DEFAULT_TERM_WEIGHTS)
+    for name, (mg_weight, eg_weight) in (weights or {}).items():
+        TERM_WEIGHTS[name] = (int(mg_weight), int(eg_weight))
+    for name in disabled:
+        TERM_WEIGHTS[name] = (0, 0)
+    if lazy is not None:
+        LAZY_EVAL = lazy
+    lazy_margins = compute_lazy_margins()
+    eval_cache.clear()
+
+
+def load_evaluation_config(path):
+    # JSON file, e.g. {"weights": {"evaluate_piece_mobility": [100, 200]},
+    #                  "disabled": ["evaluate_center_control"], "lazy": true}
+    with open(path) as f:
+        config = json.load(f)
+    configure_evaluation(config.get('weights'), config.get('disabled', ()), config.get('lazy'))
+
+
+def enable_profiling():
+    global eval_profile
+    eval_profile = EvalProfile()
+    return eval_profile
+
+
+def disable_profiling():
+    global eval_profile
+    profile = eval_profile
+    eval_profile = None
+    return profile
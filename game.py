@@ -4,7 +4,8 @@ import random
 from chessAI import ChessEngine
 from stockfish_AI import StockfishEngine
 def main():
-    ai_white = ChessEngine()
+    # Pondering: our engine keeps searching while Stockfish thinks about its move.
+    ai_white = ChessEngine(ponder=True)
     stockfish_path = "stockfish-windows-x86-64-avx2.exe"
     ai_black = StockfishEngine(path = stockfish_path)
     #ai_white = StockfishEngine(path = stockfish_path, parameters={"Skill Level": 5, "Threads": 2, "Minimum Thinking Time": 30})
@@ -22,6 +23,8 @@ def main():
             else:
                 move = ai_black.predict_move(board)
             board.push(move)
+            if board.turn == chess.BLACK:
+                ai_white.ponder(board)
             print(board)
             print("-" * 30)
 
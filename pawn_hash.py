@@ -0,0 +1,44 @@
+import chess
+
+from search_board import PIECE_KEYS, SearchBoard
+from transposition import HashTable
+
+SCORE_OFFSET = 1 << 31
+
+
+def pawn_key(board):
+    # Zobrist key of the pawns alone, kept up to date incrementally by SearchBoard.
+    if isinstance(board, SearchBoard):
+        return board.pawn_key
+    key = 0
+    for color in chess.COLORS:
+        for square in chess.scan_reversed(board.pawns & board.occupied_co[color]):
+            key ^= PIECE_KEYS[color][chess.PAWN][square]
+    return key
+
+
+class PawnHashTable(HashTable):
+    # Direct-mapped cache of the pawn-only parts of the pawn evaluation, keyed by pawn_key:
+    # a verification slot, the packed scores and both sides' passed pawns per entry.
+    # The pawn structure changes far less often than the rest of the position, so the hit
+    # rate is high even with a small table. Each worker process keeps its own table, which
+    # the games and ponder threads of that process share.
+    SLOTS_PER_ENTRY = 4
+
+    def __init__(self, size_mb=1):
+        super().__init__(size_mb)
+
+    def probe(self, key):
+        # Returns (structure, passed_base, white passed pawns, black passed pawns) or None.
+        self.probes += 1
+        data = self.load(key)
+        # Packed scores are never 0, which tells an empty slot from the pawnless key 0.
+        if data is None or not data[0]:
+            return None
+        self.hits += 1
+        packed, white_passed, black_passed = data
+        return ((packed >> 32) - SCORE_OFFSET, (packed & 0xFFFFFFFF) - SCORE_OFFSET, white_passed, black_passed)
+
+    def store(self, key, structure, passed_base, white_passed, black_passed):
+        packed = ((structure + SCORE_OFFSET) << 32) | (passed_base + SCORE_OFFSET)
+        self.save(key, packed, white_passed, black_passed)
@@ -87,7 +87,6 @@ center_squares = [
     chess.D4, chess.D5, chess.E4, chess.E5,
 ]
 
-transposition_table = {}
 opening_book = {
     "rnbqkbnr/pppp1ppp/8/4p3/3PP3/8/PPP2PPP/RNBQKBNR b KQkq - 0 2": "d5",  # Center opening response
     # King's Pawn Opening
@@ -0,0 +1,203 @@
+import chess
+from chess.polyglot import POLYGLOT_RANDOM_ARRAY
+
+from pieces import PIECE_VALUES, KING_ENDGAME_VALUES, material_value
+
+# Polyglot layout: 12 * 64 piece keys, 4 castling keys, 8 en passant file keys, 1 turn key.
+PIECE_KEYS = [
+    [[0] * 64] + [[POLYGLOT_RANDOM_ARRAY[64 * ((piece_type - 1) * 2 + color) + square] for square in chess.SQUARES]
+                  for piece_type in chess.PIECE_TYPES]
+    for color in (chess.BLACK, chess.WHITE)
+]
+CASTLING_KEYS = [
+    (chess.BB_H1, POLYGLOT_RANDOM_ARRAY[768]),
+    (chess.BB_A1, POLYGLOT_RANDOM_ARRAY[769]),
+    (chess.BB_H8, POLYGLOT_RANDOM_ARRAY[770]),
+    (chess.BB_A8, POLYGLOT_RANDOM_ARRAY[771]),
+]
+EP_KEYS = POLYGLOT_RANDOM_ARRAY[772:780]
+TURN_KEY = POLYGLOT_RANDOM_ARRAY[780]
+
+
+def _material_score(piece_type, color, square):
+    # Material plus piece-square value from white's point of view, as in evaluate_material.
+    # The king's square value is blended by phase separately (see KING_ENDGAME_SCORES).
+    table = PIECE_VALUES[piece_type]
+    index = square if color == chess.WHITE else chess.square_mirror(square)
+    position_value = table[index] if piece_type != chess.KING and len(table) == 64 else 0
+    value = material_value[piece_type] + position_value
+    return value if color == chess.WHITE else -value
+
+
+MATERIAL_SCORES = [
+    [[0] * 64] + [[_material_score(piece_type, color, square) for square in chess.SQUARES]
+                  for piece_type in chess.PIECE_TYPES]
+    for color in (chess.BLACK, chess.WHITE)
+]
+KING_ENDGAME_SCORES = [[-value for value in KING_ENDGAME_VALUES], list(KING_ENDGAME_VALUES)]
+
+# Game phase weights, matching game_phase in evaluation.py: 24 with all pieces on the board.
+PHASE_UNITS = [0, 0, 1, 1, 2, 4, 0]
+FULL_PHASE_UNITS = 2 * (PHASE_UNITS[chess.QUEEN] + 2 * PHASE_UNITS[chess.ROOK] + 2 * PHASE_UNITS[chess.BISHOP]
+                        + 2 * PHASE_UNITS[chess.KNIGHT])
+
+_castling_key_cache = {}
+
+
+def castling_key(castling_rights):
+    key = _castling_key_cache.get(castling_rights)
+    if key is None:
+        key = 0
+        for mask, value in CASTLING_KEYS:
+            if castling_rights & mask:
+                key ^= value
+        _castling_key_cache[castling_rights] = key
+    return key
+
+
+def ep_key(board):
+    # Same rule as polyglot: only hash the file if a pawn could actually capture there.
+    ep_square = board.ep_square
+    if ep_square is None:
+        return 0
+    if board.turn == chess.WHITE:
+        ep_mask = chess.shift_down(chess.BB_SQUARES[ep_square])
+    else:
+        ep_mask = chess.shift_up(chess.BB_SQUARES[ep_square])
+    ep_mask = chess.shift_left(ep_mask) | chess.shift_right(ep_mask)
+    if ep_mask & board.pawns & board.occupied_co[board.turn]:
+        return EP_KEYS[chess.square_file(ep_square)]
+    return 0
+
+
+class SearchBoard(chess.Board):
+    # Board used inside the search. Keeps a polyglot compatible zobrist key and the
+    # material/piece-square/phase totals up to date on push/pop, so the search never
+    # builds a FEN string to identify a position and evaluation never rescans the board.
+    # Standard chess only (castling keys assume rooks on the corner squares).
+    _piece_key = 0
+    pawn_key = 0
+    material = 0
+    king_endgame = 0
+    phase_units = 0
+    # Plies since the last capture, pawn move or null move. No earlier position can come
+    # back, so repetition detection only looks this far down the key stack.
+    reversible_plies = 0
+
+    def __init__(self, fen=chess.STARTING_FEN, *, chess960=False):
+        super().__init__(fen, chess960=chess960)
+        self._key_stack = []
+        self._refresh_keys()
+
+    @classmethod
+    def from_board(cls, board):
+        # Replay the game so repetition detection still sees the history.
+        search_board = cls(board.root().fen())
+        for move in board.move_stack:
+            search_board.push(move)
+        return search_board
+
+    def _refresh_keys(self):
+        piece_key = 0
+        pawn_key = 0
+        material = 0
+        king_endgame = 0
+        phase_units = 0
+        for color in (chess.WHITE, chess.BLACK):
+            for square in chess.scan_reversed(self.occupied_co[color]):
+                piece_type = self.piece_type_at(square)
+                piece_key ^= PIECE_KEYS[color][piece_type][square]
+                material += MATERIAL_SCORES[color][piece_type][square]
+                phase_units += PHASE_UNITS[piece_type]
+                if piece_type == chess.PAWN:
+                    pawn_key ^= PIECE_KEYS[color][piece_type][square]
+                elif piece_type == chess.KING:
+                    king_endgame += KING_ENDGAME_SCORES[color][square]
+        self._piece_key = piece_key
+        self.pawn_key = pawn_key
+        self.material = material
+        self.king_endgame = king_endgame
+        self.phase_units = phase_units
+        self.zobrist_key = self._full_key()
+
+    def _full_key(self):
+        key = self._piece_key ^ castling_key(self.castling_rights) ^ ep_key(self)
+        if self.turn == chess.WHITE:
+            key ^= TURN_KEY
+        return key
+
+    def _remove_piece_at(self, square):
+        color = bool(self.occupied_co[chess.WHITE] & chess.BB_SQUARES[square])
+        piece_type = super()._remove_piece_at(square)
+        if piece_type:
+            self._piece_key ^= PIECE_KEYS[color][piece_type][square]
+            self.material -= MATERIAL_SCORES[color][piece_type][square]
+            self.phase_units -= PHASE_UNITS[piece_type]
+            if piece_type == chess.PAWN:
+                self.pawn_key ^= PIECE_KEYS[color][piece_type][square]
+            elif piece_type == chess.KING:
+                self.king_endgame -= KING_ENDGAME_SCORES[color][square]
+        return piece_type
+
+    def _set_piece_at(self, square, piece_type, color, promoted=False):
+        super()._set_piece_at(square, piece_type, color, promoted)
+        self._piece_key ^= PIECE_KEYS[color][piece_type][square]
+        self.material += MATERIAL_SCORES[color][piece_type][square]
+        self.phase_units += PHASE_UNITS[piece_type]
+        if piece_type == chess.PAWN:
+            self.pawn_key ^= PIECE_KEYS[color][piece_type][square]
+        elif piece_type == chess.KING:
+            self.king_endgame += KING_ENDGAME_SCORES[color][square]
+
+    def push(self, move):
+        self._key_stack.append((self._piece_key, self.zobrist_key, self.pawn_key, self.material,
+                                self.king_endgame, self.phase_units, self.reversible_plies))
+        super().push(move)
+        self.zobrist_key = self._full_key()
+        self.reversible_plies = min(self.reversible_plies + 1, self.halfmove_clock) if move else 0
+
+    def pop(self):
+        move = super().pop()
+        (self._piece_key, self.zobrist_key, self.pawn_key, self.material, self.king_endgame,
+         self.phase_units, self.reversible_plies) = self._key_stack.pop()
+        return move
+
+    def is_repetition(self, count=3):
+        # Same answer as chess.Board.is_repetition, from the zobrist keys of the positions
+        # with the same side to move since the last irreversible move instead of replaying
+        # the move stack.
+        key = self.zobrist_key
+        stack = self._key_stack
+        seen = 1
+        for back in range(2, self.reversible_plies + 1, 2):
+            if stack[-back][1] == key:
+                seen += 1
+                if seen >= count:
+                    return True
+        return seen >= count
+
+    def is_insufficient_material(self):
+        # A pawn, rook or queen anywhere is always mating material; only positions with
+        # minor pieces alone go through the per-color check.
+        if self.pawns or self.rooks or self.queens:
+            return False
+        return super().is_insufficient_material()
+
+    def is_draw_by_rule(self):
+        # Twofold repetition, the fifty-move rule or a dead position, as scored inside the
+        # search. Mate on the hundredth ply still counts as mate.
+        if self.halfmove_clock >= 100:
+            return not self.is_check() or any(self.generate_legal_moves())
+        return self.is_repetition(2) or self.is_insufficient_material()
+
+    def copy(self, *, stack=True):
+        board = super().copy(stack=stack)
+        board._piece_key = self._piece_key
+        board.zobrist_key = self.zobrist_key
+        board.pawn_key = self.pawn_key
+        board.material = self.material
+        board.king_endgame = self.king_endgame
+        board.phase_units = self.phase_units
+        board._key_stack = self._key_stack[len(self._key_stack) - len(board.move_stack):]
+        board.reversible_plies = min(self.reversible_plies, len(board._key_stack))
+        return board
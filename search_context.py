@@ -0,0 +1,58 @@
+from array import array
+
+from search_stats import SearchStats
+from time_manager import TimeManager
+
+MAX_PLY = 128
+HISTORY_LIMIT = 1 << 16  # all history scores are halved once one of them passes this
+
+
+def move_index(move):
+    return move.from_square << 6 | move.to_square
+
+
+class SearchContext:
+    # Everything a search writes apart from the shared hash tables: killers, history,
+    # countermoves, the PV table, the clock and the counters. Every game keeps its own
+    # context, so one process can search any number of games, and no search touches
+    # another one's move ordering. History and countermoves carry over from one move of a
+    # game to the next (history is halved at the start of every search); killers and the
+    # PV table are per search.
+    def __init__(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY + 2)]
+        self.history = array('l', [0]) * (64 * 64)  # from * 64 + to
+        self.countermoves = [None] * (64 * 64)  # reply to the opponent's last move, by its from * 64 + to
+        self.pv_table = [[] for _ in range(MAX_PLY + 2)]
+        self.time_manager = TimeManager()
+        self.stats = SearchStats()
+
+    def new_search(self, time_manager, stats):
+        self.time_manager = time_manager
+        self.stats = stats
+        for slots in self.killers:
+            slots[0] = slots[1] = None
+        self.age_history()
+
+    def age_history(self):
+        history = self.history
+        for index in range(len(history)):
+            history[index] >>= 1
+
+    def countermove(self, board):
+        last_move = board.peek() if board.move_stack else None
+        return self.countermoves[move_index(last_move)] if last_move else None
+
+    def update_quiet(self, board, move, depth, ply):
+        # A quiet move caused a beta cutoff: it becomes the first killer at this ply, the
+        # countermove to the opponent's last move and gains depth^2 history.
+        slots = self.killers[ply]
+        if slots[0] != move:
+            slots[1] = slots[0]
+            slots[0] = move
+        index = move_index(move)
+        self.history[index] += depth * depth
+        if self.history[index] > HISTORY_LIMIT:
+            self.age_history()
+        last_move = board.peek() if board.move_stack else None
+        if last_move:
+            self.countermoves[move_index(last_move)] = move
@@ -0,0 +1,95 @@
+import time
+
+
+class SearchStats:
+    # Counters are plain int attributes bumped inline in the search, so collecting them
+    # costs a few attribute increments per node. Every counter, transposition table probes
+    # and lazy evaluations included, belongs to this search alone, so concurrent searches
+    # in the same process (other games, pondering) never mix into it.
+    def __init__(self):
+        self.nodes = 0
+        self.qnodes = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.null_move_cutoffs = 0
+        self.lmr_researches = 0
+        self.aspiration_researches = 0
+        self.reverse_futility_cutoffs = 0
+        self.razor_cutoffs = 0
+        self.futility_prunes = 0  # quiet moves skipped by futility pruning
+        self.late_move_prunes = 0  # ... and by late move pruning
+        self.pvs_researches = 0  # null window scouts that had to be searched again
+        self.fail_highs = 0
+        self.first_move_fail_highs = 0
+        self.helper_nodes = 0  # nodes searched by Lazy SMP helpers, filled in by smp.py
+        self.lazy_evals = 0  # evaluations given an alpha/beta window (quiescence stand pat)
+        self.lazy_exits = 0  # ... of which stopped early
+        self.depth = 0
+        self.score = None
+        self.best_move = None
+        self.pv = []
+        self.iterations = []
+        self.elapsed = 0.0
+        self.start_time = time.time()
+
+    def start(self):
+        self.start_time = time.time()
+
+    def update(self):
+        self.elapsed = time.time() - self.start_time
+
+    def end_iteration(self, depth, score, move, pv=None):
+        self.update()
+        self.depth = depth
+        self.score = score
+        self.best_move = move
+        self.pv = pv or ([move] if move else [])
+        self.iterations.append({
+            'depth': depth,
+            'score': score,
+            'move': move.uci() if move else None,
+            'pv': [pv_move.uci() for pv_move in self.pv],
+            'time': self.elapsed,
+            'nodes': self.nodes + self.qnodes,
+        })
+
+    @property
+    def total_nodes(self):
+        return self.nodes + self.qnodes
+
+    @property
+    def nps(self):
+        return self.total_nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_fail_highs / self.fail_highs if self.fail_highs else 0.0
+
+    def as_dict(self):
+        return {
+            'depth': self.depth,
+            'score': self.score,
+            'best_move': self.best_move.uci() if self.best_move else None,
+            'pv': [move.uci() for move in self.pv],
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'helper_nodes': self.helper_nodes,
+            'nps': self.nps,
+            'time': self.elapsed,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_cutoffs': self.tt_cutoffs,
+            'null_move_cutoffs': self.null_move_cutoffs,
+            'lmr_researches': self.lmr_researches,
+            'aspiration_researches': self.aspiration_researches,
+            'reverse_futility_cutoffs': self.reverse_futility_cutoffs,
+            'razor_cutoffs': self.razor_cutoffs,
+            'futility_prunes': self.futility_prunes,
+            'late_move_prunes': self.late_move_prunes,
+            'pvs_researches': self.pvs_researches,
+            'first_move_cutoff_rate': self.first_move_cutoff_rate,
+            'lazy_evals': self.lazy_evals,
+            'lazy_exits': self.lazy_exits,
+            'iterations': self.iterations,
+        }
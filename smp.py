@@ -0,0 +1,118 @@
+import multiprocessing
+import sys
+import time
+
+import chess
+
+import algorithm
+import evaluation
+from algorithm import iterative_deepening
+from search_stats import SearchStats
+
+# Lazy SMP: every worker runs its own iterative deepening on the same root and they
+# cooperate only through the shared, lock-free transposition table and evaluation cache.
+
+_stop_flag = None
+
+
+def _init_helper(tt, eval_cache, stop_flag, term_weights, lazy_eval, pruning):
+    global _stop_flag
+    # Spawned helpers (Windows) start from the module defaults, so the parent's evaluation
+    # and pruning settings come in as arguments. configure_evaluation() clears the eval
+    # cache, so it runs before the shared cache is installed.
+    evaluation.configure_evaluation(weights=term_weights, lazy=lazy_eval)
+    algorithm.configure_pruning(enabled=[name for name, on in pruning.items() if on],
+                                disabled=[name for name, on in pruning.items() if not on])
+    algorithm.transposition_table = tt
+    evaluation.eval_cache = eval_cache
+    _stop_flag = stop_flag
+
+
+def _helper_search(root_fen, moves, max_depth, time_limit, helper_id):
+    board = chess.Board(root_fen)
+    for uci in moves:
+        board.push_uci(uci)
+    stats = SearchStats()
+    move = iterative_deepening(board, max_depth, time_limit, helper_id=helper_id, stop_flag=_stop_flag, stats=stats)
+    return (move.uci() if move else None), stats.depth, stats.total_nodes
+
+
+class ParallelSearch:
+    def __init__(self, workers, tt, eval_cache):
+        for table in (tt, eval_cache):
+            if not table.shared:
+                table.resize(table.size_mb, shared=True)
+        self.workers = workers
+        self.stop_flag = multiprocessing.RawValue('b', 0)
+        # The calling process is worker 0, the pool holds the helpers. They search with the
+        # evaluation and pruning settings in effect now.
+        self.pool = multiprocessing.Pool(workers - 1, initializer=_init_helper,
+                                         initargs=(tt, eval_cache, self.stop_flag, dict(evaluation.TERM_WEIGHTS),
+                                                   evaluation.LAZY_EVAL, dict(algorithm.PRUNING)))
+
+    def search(self, board, max_depth=10, time_limit=5.0, limits=None, stats=None, on_iteration=None, context=None):
+        # Helpers only need a hard limit: they are stopped through the flag once the main search is done.
+        self.stop_flag.value = 0
+        root_fen = board.root().fen()
+        moves = [move.uci() for move in board.move_stack]
+        helper_time = limits.hard_limit if limits else time_limit
+        pending = [self.pool.apply_async(_helper_search, (root_fen, moves, max_depth, helper_time, helper_id))
+                   for helper_id in range(1, self.workers)]
+
+        stats = stats or SearchStats()
+        best_move = iterative_deepening(board, max_depth, time_limit, limits=limits, stats=stats,
+                                        on_iteration=on_iteration, context=context)
+        self.stop_flag.value = 1
+
+        # A helper that completed a deeper iteration than the main search wins.
+        best_depth = stats.depth
+        for result in pending:
+            uci, depth, nodes = result.get()
+            stats.helper_nodes += nodes
+            if uci and depth > best_depth:
+                best_move = chess.Move.from_uci(uci)
+                best_depth = depth
+        return best_move
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+SPEEDUP_POSITIONS = [
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10",
+    "r1bq1rk1/ppp2ppp/2np1n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQ1RK1 w - - 0 7",
+    "8/5pk1/6p1/3R4/5P2/6PK/r7/8 w - - 0 45",
+]
+
+
+def measure_speedup(max_workers, depth=4, positions=SPEEDUP_POSITIONS):
+    # Time-to-depth for 1..max_workers workers, with cleared tables for every run.
+    tt = algorithm.transposition_table
+    eval_cache = evaluation.eval_cache
+    tt.resize(tt.size_mb, shared=True)
+    eval_cache.resize(eval_cache.size_mb, shared=True)
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        search = ParallelSearch(workers, tt, eval_cache) if workers > 1 else None
+        elapsed = 0.0
+        for fen in positions:
+            tt.clear()
+            eval_cache.clear()
+            board = chess.Board(fen)
+            start = time.time()
+            if search:
+                search.search(board, max_depth=depth, time_limit=float('inf'))
+            else:
+                iterative_deepening(board, max_depth=depth, time_limit=float('inf'))
+            elapsed += time.time() - start
+        if search:
+            search.close()
+        baseline = baseline or elapsed
+        print(f"workers={workers} depth={depth} time={elapsed:.2f}s speedup={baseline / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    measure_speedup(int(sys.argv[1]) if len(sys.argv) > 1 else multiprocessing.cpu_count(),
+                    depth=int(sys.argv[2]) if len(sys.argv) > 2 else 4)
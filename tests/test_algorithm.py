@@ -0,0 +1,11 @@
+from algorithm import quiescence_search
+from search_board import SearchBoard
+from search_context import SearchContext
+
+
+def test_quiescence_scores_stalemate_with_pieces_left():
+    # Black's knight is pinned and the king has no square: stalemate although Black still
+    # has a piece, so the stand pat must not be trusted.
+    board = SearchBoard('7k/5Kn1/6P1/4B3/8/8/8/8 b - - 0 1')
+    assert board.is_stalemate()
+    assert quiescence_search(SearchContext(), board, -999999, 999999, -1) == 0
@@ -0,0 +1,35 @@
+import random
+
+import chess
+
+from batch_eval import evaluate_batch
+from evaluation import DEFAULT_TERM_WEIGHTS, configure_evaluation, evaluate_tapered
+
+
+def random_boards(seed, games, plies):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(games):
+        board = chess.Board()
+        for _ in range(plies):
+            legal = list(board.legal_moves)
+            if not legal:
+                break
+            board.push(rng.choice(legal))
+            boards.append(board.copy(stack=False))
+    return boards
+
+
+def test_batch_matches_scalar_material_and_pawn_structure():
+    # evaluate_batch is evaluate_tapered with every term but pawn structure disabled.
+    boards = random_boards(16, 20, 160)
+    configure_evaluation(disabled=[name for name in DEFAULT_TERM_WEIGHTS if name != 'evaluate_pawn_structure'])
+    try:
+        expected = [evaluate_tapered(board)[0] for board in boards]
+    finally:
+        configure_evaluation()
+    assert evaluate_batch(boards).tolist() == expected
+
+
+def test_empty_batch():
+    assert len(evaluate_batch([])) == 0
@@ -0,0 +1,140 @@
+import random
+
+import chess
+
+from evaluation import (evaluate_board, evaluate_king_safety, evaluate_king_shield, evaluate_passed_pawns, evaluate_pawn_entry,
+                        evaluate_pawn_structure, evaluate_game_phase, manhattan_distance)
+from search_board import SearchBoard
+
+# Square-by-square versions of the bitboard pawn and king terms, as they were written
+# before the bitboard rewrite. The evaluation must keep scoring exactly like them.
+
+
+def own_pawn_at(board, square, color):
+    piece = board.piece_at(square)
+    return piece is not None and piece.piece_type == chess.PAWN and piece.color == color
+
+
+def is_passed(board, pawn_sq, color):
+    file = chess.square_file(pawn_sq)
+    rank = chess.square_rank(pawn_sq)
+    blocker_ranks = range(rank + 1, 8) if color == chess.WHITE else range(0, rank)
+    return not any(own_pawn_at(board, chess.square(f, r), not color)
+                   for r in blocker_ranks for f in (file - 1, file, file + 1) if 0 <= f < 8)
+
+
+def reference_pawn_entry(board):
+    structure = 0
+    passed_base = 0
+    passed = [0, 0]
+    for color in [chess.WHITE, chess.BLACK]:
+        pawns = list(board.pieces(chess.PAWN, color))
+        files = [chess.square_file(p) for p in pawns]
+        file_count = {f: files.count(f) for f in set(files)}
+        penalty = sum(30 for count in file_count.values() if count > 1)
+        penalty += sum(25 * file_count[f] for f in range(8)
+                       if file_count.get(f, 0) and file_count.get(f - 1, 0) + file_count.get(f + 1, 0) == 0)
+        bonus = 0
+        for pawn_sq in pawns:
+            if is_passed(board, pawn_sq, color):
+                passed[color] |= chess.BB_SQUARES[pawn_sq]
+                bonus += 50 + chess.square_rank(pawn_sq) * 10
+        structure += -penalty if color == chess.WHITE else penalty
+        passed_base += bonus if color == chess.WHITE else -bonus
+    return structure, passed_base, passed[chess.WHITE], passed[chess.BLACK]
+
+
+def reference_passed_pawns(board):
+    score = 0
+    for color in [chess.WHITE, chess.BLACK]:
+        for pawn_sq in board.pieces(chess.PAWN, color):
+            if not is_passed(board, pawn_sq, color):
+                continue
+            file = chess.square_file(pawn_sq)
+            rank = chess.square_rank(pawn_sq)
+            if color == chess.WHITE:
+                base_value = 20 * (rank + 1)
+                promotion_distance = 7 - rank
+            else:
+                base_value = 20 * (8 - rank)
+                promotion_distance = rank
+            if (color == chess.WHITE and rank >= 5) or (color == chess.BLACK and rank <= 2):
+                base_value *= 2
+            king_sq = board.king(color)
+            if king_sq:
+                base_value += (7 - manhattan_distance(king_sq, pawn_sq)) * 10
+            opponent_king_sq = board.king(not color)
+            if opponent_king_sq:
+                promotion_sq = chess.square(file, 7 if color == chess.WHITE else 0)
+                if manhattan_distance(opponent_king_sq, promotion_sq) > \
+                        promotion_distance + (0 if board.turn == color else 1):
+                    base_value *= 3
+            score += base_value if color == chess.WHITE else -base_value
+    return score
+
+
+def shield_squares(king_square, color):
+    file = chess.square_file(king_square)
+    shield_rank = chess.square_rank(king_square) + (1 if color == chess.WHITE else -1)
+    if not 0 <= shield_rank < 8:
+        return []
+    return [chess.square(f, shield_rank) for f in (file - 1, file, file + 1) if 0 <= f < 8]
+
+
+def reference_king_safety(board):
+    score = 0
+    for color in [chess.WHITE, chess.BLACK]:
+        king_square = board.king(color)
+        if king_square is None:
+            continue
+        file = chess.square_file(king_square)
+        open_file_penalty = sum(500 for f in (file - 1, file, file + 1)
+                                if 0 <= f < 8 and not any(own_pawn_at(board, chess.square(f, r), color)
+                                                          for r in range(8)))
+        shield_bonus = sum(300 for square in shield_squares(king_square, color) if own_pawn_at(board, square, color))
+        safety_score = shield_bonus - open_file_penalty
+        score += safety_score if color == chess.WHITE else -safety_score
+    return score
+
+
+def reference_king_shield(board):
+    score = 0
+    for color in [chess.WHITE, chess.BLACK]:
+        king_square = board.king(color)
+        if king_square is None:
+            continue
+        shield_pawns = sum(1 for square in shield_squares(king_square, color) if own_pawn_at(board, square, color))
+        if shield_pawns < 2:
+            score += -100 if color == chess.WHITE else 100
+    return score
+
+
+def random_positions(seed, games, plies):
+    rng = random.Random(seed)
+    for _ in range(games):
+        board = SearchBoard()
+        for _ in range(plies):
+            legal = list(board.legal_moves)
+            if not legal:
+                break
+            board.push(rng.choice(legal))
+            yield board
+
+
+def test_bitboard_pawn_and_king_terms_match_reference():
+    for board in random_positions(11, 25, 160):
+        entry = reference_pawn_entry(board)
+        assert evaluate_pawn_entry(board) == entry
+        assert evaluate_pawn_structure(board) == entry[0] + entry[1] * evaluate_game_phase(board)
+        assert evaluate_passed_pawns(board) == reference_passed_pawns(board)
+        assert evaluate_king_safety(board) == reference_king_safety(board)
+        assert evaluate_king_shield(board) == reference_king_shield(board)
+
+
+def test_cached_evaluation_stays_an_integer():
+    board = SearchBoard('r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3')
+    board.push_uci('f1c4')
+    first = evaluate_board(board)
+    second = evaluate_board(board)
+    assert first == second
+    assert type(first) is int and type(second) is int
@@ -0,0 +1,32 @@
+import chess
+
+from eval_cache import EvalCache
+from pawn_hash import PawnHashTable
+from transposition import LOWERBOUND, TranspositionTable
+
+
+def test_entries_round_trip():
+    tt = TranspositionTable(1)
+    tt.store(123, -55, 3, LOWERBOUND, chess.Move.from_uci('e2e4'))
+    assert tt.probe(123) == (-55, 3, LOWERBOUND, chess.Move.from_uci('e2e4'))
+    assert tt.probe(123 + tt.size) is None
+
+    cache = EvalCache(1)
+    cache.store(7, -3199)
+    cache.store(8, 0)
+    assert cache.probe(7) == -3199 and cache.probe(8) == 0
+
+    pawn_hash = PawnHashTable(1)
+    assert pawn_hash.probe(0) is None  # empty slot, pawnless key
+    pawn_hash.store(0, -5, 7, 1 << 20, 1 << 40)
+    assert pawn_hash.probe(0) == (-5, 7, 1 << 20, 1 << 40)
+
+
+def test_torn_entries_fail_verification():
+    # A data slot changed without its verification slot, as a concurrent writer would leave it.
+    for table, store in ((TranspositionTable(1), lambda table: table.store(99, 10, 2, LOWERBOUND)),
+                         (EvalCache(1), lambda table: table.store(99, 10)),
+                         (PawnHashTable(1), lambda table: table.store(99, 10, 20, 3, 4))):
+        store(table)
+        table.slots[table.index(99) + table.SLOTS_PER_ENTRY - 1] ^= 1
+        assert table.probe(99) is None
@@ -0,0 +1,73 @@
+import random
+
+import chess
+import chess.polyglot
+
+from search_board import SearchBoard
+
+
+def random_game(rng, board, plies):
+    # Plays up to `plies` random legal moves on `board` and returns the moves played.
+    moves = []
+    for _ in range(plies):
+        legal = list(board.legal_moves)
+        if not legal:
+            break
+        move = rng.choice(legal)
+        board.push(move)
+        moves.append(move)
+    return moves
+
+
+def incremental_state(board):
+    return (board.zobrist_key, board.pawn_key, board.material, board.king_endgame, board.phase_units)
+
+
+def test_incremental_state_matches_full_scan():
+    # After every push and pop the incrementally updated keys and totals must equal a scan
+    # of the position from scratch, and the key must be the polyglot hash.
+    rng = random.Random(3)
+    for _ in range(30):
+        board = SearchBoard()
+        history = [incremental_state(board)]
+        for move in random_game(rng, chess.Board(), 150):
+            board.push(move)
+            assert incremental_state(board) == incremental_state(SearchBoard(board.fen()))
+            assert board.zobrist_key == chess.polyglot.zobrist_hash(board)
+            history.append(incremental_state(board))
+        while board.move_stack:
+            board.pop()
+            history.pop()
+            assert incremental_state(board) == history[-1]
+
+
+def test_copy_keeps_incremental_state():
+    rng = random.Random(4)
+    board = SearchBoard()
+    random_game(rng, board, 60)
+    copy = board.copy()
+    assert incremental_state(copy) == incremental_state(board)
+    while copy.move_stack:
+        copy.pop()
+        assert incremental_state(copy) == incremental_state(SearchBoard(copy.fen()))
+
+
+def test_is_repetition_matches_python_chess():
+    # Games that mostly shuffle pieces back and forth, so twofold and threefold repetitions
+    # are frequent; after every move the key stack answer must match chess.Board's.
+    rng = random.Random(21)
+    repetitions = 0
+    for _ in range(40):
+        board = SearchBoard()
+        for _ in range(120):
+            legal = list(board.legal_moves)
+            if not legal:
+                break
+            quiet = [move for move in legal if not board.is_capture(move)
+                     and board.piece_type_at(move.from_square) in (chess.KNIGHT, chess.KING)]
+            board.push(rng.choice(quiet if quiet and rng.random() < 0.9 else legal))
+            for count in (2, 3):
+                expected = chess.Board.is_repetition(board, count)
+                assert board.is_repetition(count) == expected
+                repetitions += expected
+    assert repetitions
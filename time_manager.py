@@ -0,0 +1,65 @@
+import time
+
+import chess
+
+# All times are in seconds, like time_limit in iterative_deepening.
+MOVE_OVERHEAD = 0.05  # kept in reserve for move transmission and GUI lag
+DEFAULT_MOVES_TO_GO = 30
+DEFAULT_TIME_LIMIT = 5.0  # per move, when the side to move has no clock
+CHECK_INTERVAL = 32  # nodes between clock/stop-flag polls
+
+
+class SearchAborted(Exception):
+    pass
+
+
+class TimeManager:
+    # Soft limit: no new iteration is started after it has passed.
+    # Hard limit: the search is aborted from inside the tree (see check()).
+    def __init__(self, time_limit=None, wtime=None, btime=None, winc=0.0, binc=0.0, movestogo=None,
+                 turn=chess.WHITE, stop_flag=None):
+        self.start_time = time.time()
+        self.stop_flag = stop_flag
+        self.nodes = 0
+        self.next_check = CHECK_INTERVAL
+        self.soft_limit = float('inf')
+        self.hard_limit = float('inf')
+
+        remaining = wtime if turn == chess.WHITE else btime
+        increment = winc if turn == chess.WHITE else binc
+        if remaining is None and time_limit is None and (wtime is not None or btime is not None):
+            # Only the opponent's clock was given: don't search unbounded.
+            time_limit = DEFAULT_TIME_LIMIT
+        if remaining is not None:
+            available = max(0.01, remaining - MOVE_OVERHEAD)
+            moves_to_go = movestogo or DEFAULT_MOVES_TO_GO
+            optimum = available / moves_to_go + increment * 0.75
+            self.soft_limit = min(optimum, available * 0.5)
+            self.hard_limit = min(optimum * 3, available * 0.75)
+        if time_limit is not None:
+            self.soft_limit = min(self.soft_limit, time_limit * 0.9)
+            self.hard_limit = min(self.hard_limit, time_limit)
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def stopped(self):
+        return (self.stop_flag is not None and self.stop_flag.value) or self.elapsed() > self.hard_limit
+
+    def soft_expired(self):
+        return (self.stop_flag is not None and self.stop_flag.value) or self.elapsed() > self.soft_limit
+
+    def ponder_hit(self, limits):
+        # A search started without limits (pondering) continues under the budgets of
+        # `limits`, counted from now: the time already spent pondering is free.
+        elapsed = self.elapsed()
+        self.soft_limit = elapsed + limits.soft_limit
+        self.hard_limit = elapsed + limits.hard_limit
+
+    def check(self):
+        # Called once per node; only every CHECK_INTERVAL nodes looks at the clock.
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.next_check = self.nodes + CHECK_INTERVAL
+            if self.stopped():
+                raise SearchAborted()
@@ -0,0 +1,195 @@
+import ctypes
+import multiprocessing
+from array import array
+
+import chess
+
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+
+# Packed entry layout (low to high bits):
+#   move 16 | age 6 | flag 2 | depth 8 | score 32
+SCORE_OFFSET = 1 << 31
+MAX_SCORE = SCORE_OFFSET - 1
+AGE_MASK = 0x3F
+
+
+def encode_move(move):
+    if move is None:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code):
+    if not code:
+        return None
+    return chess.Move(code & 0x3F, (code >> 6) & 0x3F, (code >> 12) or None)
+
+
+def allocate(size, shared):
+    if shared:
+        raw = multiprocessing.RawArray(ctypes.c_uint64, size)
+        return raw, memoryview(raw).cast('B').cast('Q')
+    return None, array('Q', [0]) * size
+
+
+class HashTable:
+    # Direct-mapped table of SLOTS_PER_ENTRY 64-bit slots per entry, with a power-of-two
+    # number of entries so the index is a single mask. Entries are written lock-free: the
+    # first slot holds the key XORed with every data slot of the entry, so an entry torn by
+    # a concurrent writer (another thread, or another process when shared) fails
+    # verification on load instead of returning data belonging to a different position.
+    SLOTS_PER_ENTRY = 2
+
+    def __init__(self, size_mb, shared=False):
+        self.shared = shared
+        self.resize(size_mb)
+
+    def resize(self, size_mb, shared=None):
+        if shared is not None:
+            self.shared = shared
+        entries = max(1, int(size_mb * 1024 * 1024) // (8 * self.SLOTS_PER_ENTRY))
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self.size_mb = size_mb
+        self._raw, self.slots = allocate(self.SLOTS_PER_ENTRY * self.size, self.shared)
+        self.reset_stats()
+
+    def clear(self):
+        if self.shared:
+            # Zero in place: worker processes keep their mapping of the same buffers.
+            ctypes.memset(self._raw, 0, ctypes.sizeof(self._raw))
+            self.reset_stats()
+        else:
+            self.resize(self.size_mb)
+
+    def __getstate__(self):
+        if not self.shared:
+            raise TypeError(f'only shared {type(self).__name__} tables can be sent to worker processes')
+        # The views are rebuilt over the shared buffers on the other side.
+        return {name: value for name, value in self.__dict__.items() if not isinstance(value, memoryview)}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.slots = memoryview(self._raw).cast('B').cast('Q')
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def index(self, key):
+        return (key & self.mask) * self.SLOTS_PER_ENTRY
+
+    def load(self, key):
+        # Data slots of the entry stored for `key`, or None. The single data slot case is
+        # the transposition table and eval cache probe, so it skips the loop.
+        slots = self.slots
+        if self.SLOTS_PER_ENTRY == 2:
+            index = (key & self.mask) << 1
+            data = slots[index + 1]
+            return (data,) if slots[index] ^ data == key else None
+        index = (key & self.mask) * self.SLOTS_PER_ENTRY
+        data = tuple(slots[index + 1:index + self.SLOTS_PER_ENTRY])
+        check = slots[index]
+        for word in data:
+            check ^= word
+        return data if check == key else None
+
+    def save(self, key, *data):
+        # Data first, verification slot last.
+        slots = self.slots
+        index = (key & self.mask) * self.SLOTS_PER_ENTRY
+        if len(data) == 1:
+            slots[index + 1] = data[0]
+            slots[index] = key ^ data[0]
+        else:
+            check = key
+            for offset, word in enumerate(data, 1):
+                slots[index + offset] = word
+                check ^= word
+            slots[index] = check
+        self.stores += 1
+
+    def stats(self):
+        return {
+            'size_mb': self.size_mb,
+            'entries': self.size,
+            'shared': self.shared,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'stores': self.stores,
+        }
+
+
+class TranspositionTable(HashTable):
+    # One verification slot and one packed entry (see above) per position.
+    def __init__(self, size_mb=16, shared=False):
+        super().__init__(size_mb, shared)
+
+    def resize(self, size_mb, shared=None):
+        super().resize(size_mb, shared)
+        # The search age lives in shared memory too so every worker ages entries alike.
+        self._raw_meta, self.meta = allocate(1, self.shared)
+
+    def clear(self):
+        super().clear()
+        if self.shared:
+            ctypes.memset(self._raw_meta, 0, ctypes.sizeof(self._raw_meta))
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.meta = memoryview(self._raw_meta).cast('B').cast('Q')
+
+    def reset_stats(self):
+        super().reset_stats()
+        self.collisions = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        # Entries from older searches become replaceable regardless of depth.
+        self.meta[0] = (self.meta[0] + 1) & AGE_MASK
+
+    def probe(self, key):
+        # Returns (score, depth, flag, move) or None.
+        self.probes += 1
+        data = self.load(key)
+        if data is None:
+            if self.slots[self.index(key) + 1]:
+                self.collisions += 1
+            return None
+        self.hits += 1
+        entry = data[0]
+        return ((entry >> 32) - SCORE_OFFSET, (entry >> 24) & 0xFF, (entry >> 22) & 0x3,
+                decode_move(entry & 0xFFFF))
+
+    def store(self, key, score, depth, flag, move=None):
+        entry = self.slots[self.index(key) + 1]
+        age = self.meta[0]
+        if entry and self.load(key) is None:
+            if (entry >> 16) & AGE_MASK == age and depth < (entry >> 24) & 0xFF:
+                return
+            self.overwrites += 1
+
+        score = max(-MAX_SCORE, min(MAX_SCORE, int(round(score))))
+        depth = max(0, min(255, depth))
+        entry = ((score + SCORE_OFFSET) << 32) | (depth << 24) | (flag << 22) | (age << 16) | encode_move(move)
+        self.save(key, entry)
+
+    def hashfull(self):
+        # Permille of the first 1000 slots used by the current search, as reported by UCI engines.
+        sample = min(1000, self.size)
+        age = self.meta[0]
+        used = 0
+        for index in range(1, 2 * sample, 2):
+            entry = self.slots[index]
+            if entry and (entry >> 16) & AGE_MASK == age:
+                used += 1
+        return used * 1000 // sample
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(collisions=self.collisions, overwrites=self.overwrites, hashfull=self.hashfull())
+        return stats